@@ -48,8 +48,30 @@ def cno_vsm(I, Q, T):
     Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301,
     USA.
     """
-    # Calculate Power
-    Z = I**2 + Q**2
+    # Calculate Power (in double precision, the correlator outputs may be
+    # stored as float32)
+    I = np.asarray(I, dtype=np.float64)
+    Q = np.asarray(Q, dtype=np.float64)
+    return cno_vsm_from_power(I**2 + Q**2, T)
+
+def cno_vsm_from_power(Z, T):
+    """
+    C/No by the Variance Summing Method from the prompt powers of the
+    interval, so that tracking can keep them in a preallocated buffer
+    instead of keeping the I and Q values.
+
+    Parameters
+    ----------
+    Z : np.ndarray
+        Prompt powers I**2 + Q**2 of the interval
+    T : float
+        Accumulation interval in Tracking (in seconds)
+
+    Returns
+    -------
+    float
+        Estimated C/No (in dB-Hz), NaN if it cannot be estimated
+    """
     # Calculate the mean and variance of the Power
     Zm = np.mean(Z)
     Zv = np.var(Z)
@@ -44,6 +44,8 @@ USA.
 --------------------------------------------------------------------------
 """
 
+from init_settings import C
+
 def calculate_pseudoranges(track_results, sub_frame_start, TOW, curr_meas_sample, local_time, channel_list, settings):
     """
     Calculate relative pseudoranges and transmit times for satellites.
@@ -100,6 +102,6 @@ def calculate_pseudoranges(track_results, sub_frame_start, TOW, curr_meas_sample
 
     # Convert travel time to a distance
     # The speed of light must be converted from meters per second to meters per millisecond.
-    pseudoranges = [(local_time - t) * settings.c for t in transmit_time]
+    pseudoranges = [(local_time - t) * C for t in transmit_time]
 
     return pseudoranges, transmit_time, local_time
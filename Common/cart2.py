@@ -1,4 +1,5 @@
 import numpy as np
+from Common.jit import njit
 
 def cart2geo(X, Y, Z, i):
     """
@@ -17,10 +18,20 @@ def cart2geo(X, Y, Z, i):
         lambda_deg: longitude in degrees
         h: height above ellipsoid in meters
     """
+    phi_deg, lambda_deg, h, converged, dh = _cart2geo(X, Y, Z, i)
+    if not converged:
+        print(f"Warning: did not converge. h-oldh: {dh:.2e}")
+    return phi_deg, lambda_deg, h
+
+@njit(cache=True)
+def _cart2geo(X, Y, Z, i):
+    # Compiled core of cart2geo. Also returns whether the height iteration
+    # converged and its last change (the warning is printed by cart2geo,
+    # since compiled code cannot format it).
 
     # Ellipsoid definitions (semi-major axis and flattening)
-    a_list = [6378388, 6378160, 6378135, 6378137, 6378137]
-    f_list = [1/297, 1/298.247, 1/298.26, 1/298.257222101, 1/298.257223563]
+    a_list = (6378388.0, 6378160.0, 6378135.0, 6378137.0, 6378137.0)
+    f_list = (1/297, 1/298.247, 1/298.26, 1/298.257222101, 1/298.257223563)
 
     a = a_list[i]
     f = f_list[i]
@@ -39,6 +50,7 @@ def cart2geo(X, Y, Z, i):
     h = 0.1
     oldh = 0
     iterations = 0
+    converged = True
 
     while abs(h - oldh) > 1e-12:
         oldh = h
@@ -48,14 +60,14 @@ def cart2geo(X, Y, Z, i):
 
         iterations += 1
         if iterations > 100:
-            print(f"Warning: did not converge. h-oldh: {h - oldh:.2e}")
+            converged = False
             break
 
     # Convert latitude and longitude to degrees
     phi_deg = np.degrees(phi)
     lambda_deg = np.degrees(lambda_rad)
 
-    return phi_deg, lambda_deg, h
+    return phi_deg, lambda_deg, h, converged, h - oldh
 
 def cart2utm(X, Y, Z, zone):
     """
@@ -73,6 +85,14 @@ def cart2utm(X, Y, Z, zone):
     if isinstance(zone, str):
         zone = int(''.join(filter(str.isdigit, zone)))
 
+    return _cart2utm(float(X), float(Y), float(Z), int(zone))
+
+@njit(cache=True)
+def _cart2utm(X, Y, Z, zone):
+    """
+    Compiled core of cart2utm. The zone must already be an integer.
+    """
+
     # Ellipsoid parameters (International Ellipsoid 1924)
     a = 6378388
     f = 1 / 297
@@ -85,16 +105,17 @@ def cart2utm(X, Y, Z, zone):
     scale = 0.9999988
 
     # Apply transformation to input coordinates
-    vec = np.array([X, Y, Z - 4.5])
-    R = np.array([[1, -alpha, 0],
-                  [alpha, 1, 0],
-                  [0, 0, 1]])
-    v = scale * R @ vec + trans  # coordinate vector in ED50
+    # (rotation R = [[1, -alpha, 0], [alpha, 1, 0], [0, 0, 1]] written out)
+    v = np.empty(3)  # coordinate vector in ED50
+    v[0] = scale * (X - alpha * Y) + trans[0]
+    v[1] = scale * (alpha * X + Y) + trans[1]
+    v[2] = scale * (Z - 4.5) + trans[2]
+    v_xy = np.sqrt(v[0] ** 2 + v[1] ** 2)
 
     # Initial latitude and longitude estimate (radians)
     L = np.arctan2(v[1], v[0])
     N1 = 6395000  # preliminary value
-    B = np.arctan2(v[2] / ((1 - f) ** 2 * N1), np.linalg.norm(v[:2]) / N1)
+    B = np.arctan2(v[2] / ((1 - f) ** 2 * N1), v_xy / N1)
 
     # Iterative computation of U
     U = 0.1
@@ -102,8 +123,8 @@ def cart2utm(X, Y, Z, zone):
     while abs(U - oldU) > 1e-4:
         oldU = U
         N1 = c / np.sqrt(1 + ex2 * (np.cos(B) ** 2))
-        B = np.arctan2(v[2] / ((1 - f) ** 2 * N1 + U), np.linalg.norm(v[:2]) / (N1 + U))
-        U = np.linalg.norm(v[:2]) / np.cos(B) - N1
+        B = np.arctan2(v[2] / ((1 - f) ** 2 * N1 + U), v_xy / (N1 + U))
+        U = v_xy / np.cos(B) - N1
 
     # Normalized meridian quadrant (Koenig & Weise)
     m0 = 0.0004
@@ -163,16 +184,24 @@ def cart2utm(X, Y, Z, zone):
 
     return E, N, U
 
+@njit(cache=True)
 def clsin(coeffs, order, arg):
     """
     Trigonometric series for ellipsoidal to spherical latitude conversion.
     """
-    return sum(coeffs[i] * np.sin((i + 1) * arg) for i in range(order))
+    result = 0.0
+    for i in range(order):
+        result += coeffs[i] * np.sin((i + 1) * arg)
+    return result
 
+@njit(cache=True)
 def clksin(coeffs, order, N, E):
     """
     Trigonometric series for spherical to ellipsoidal N, E conversion.
     """
-    dN = sum(coeffs[i] * np.sin((i + 1) * N) * np.cosh((i + 1) * E) for i in range(order))
-    dE = sum(coeffs[i] * np.cos((i + 1) * N) * np.sinh((i + 1) * E) for i in range(order))
+    dN = 0.0
+    dE = 0.0
+    for i in range(order):
+        dN += coeffs[i] * np.sin((i + 1) * N) * np.cosh((i + 1) * E)
+        dE += coeffs[i] * np.cos((i + 1) * N) * np.sinh((i + 1) * E)
     return dN, dE
@@ -1,3 +1,5 @@
+from Common.jit import njit
+
 def find_utm_zone(latitude, longitude):
     """
     Function finds the UTM zone number for given longitude and latitude.
@@ -35,6 +37,14 @@ def find_utm_zone(latitude, longitude):
     $Id: findUtmZone.m,v 1.1.2.2 2006/08/22 13:45:59 dpl Exp $
     """
 
+    return str(_find_utm_zone(float(latitude), float(longitude)))
+
+@njit(cache=True)
+def _find_utm_zone(latitude, longitude):
+    """
+    Compiled core of find_utm_zone. Returns the zone number as an integer.
+    """
+
     # Check value bounds =====================================================
     if longitude > 180 or longitude < -180:
         raise ValueError("Longitude value exceeds limits (-180 to 180).")
@@ -63,4 +73,4 @@ def find_utm_zone(latitude, longitude):
         if 3 <= longitude < 12:
             utm_zone = 32
 
-    return str(utm_zone)
\ No newline at end of file
+    return utm_zone
\ No newline at end of file
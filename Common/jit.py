@@ -0,0 +1,24 @@
+"""
+Optional Numba support.
+
+The numeric helpers of the receiver are decorated with ``njit`` from this
+module. When Numba is installed they are compiled to machine code (and the
+compiled code is cached on disk); otherwise the decorator is a no-op and the
+functions run as plain Python/NumPy code.
+"""
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        # Support both the bare @njit and the @njit(...) forms
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
@@ -1,7 +1,8 @@
 import numpy as np
 from .e_r_corr import e_r_corr
-from Include.topocent import topocent
+from Include.topocent import topocent_batch
 from .tropo import tropo
+from init_settings import C
 
 def least_square_pos(satpos, obs, settings):
     # Function calculates the Least Square Solution.
@@ -46,43 +47,45 @@ def least_square_pos(satpos, obs, settings):
 
     # === Iteratively find receiver position ===================================
     for it in range(n_iter):
-        for i in range(n_sats):
-            if it == 0:
-                # --- Initialize variables at the first iteration --------------
-                Rot_X = X[:, i]
-                trop = 2.0
-            else:
-                # --- Update equations -----------------------------------------
+        if it == 0:
+            # --- Initialize variables at the first iteration ------------------
+            Rot_X = X.copy()
+            trop = np.full(n_sats, 2.0)
+        else:
+            # --- Update equations ---------------------------------------------
+            for i in range(n_sats):
                 rho2 = np.sum((X[:, i] - pos[:3])**2)
-                traveltime = np.sqrt(rho2) / settings.c
+                traveltime = np.sqrt(rho2) / C
 
-                # --- Correct satellite position (due to earth rotation) -------
+                # --- Correct satellite position (due to earth rotation) ---
                 # Convert SV position at signal transmitting time to position 
                 # at signal receiving time. ECEF always changes with time as 
                 # earth rotates.
-                Rot_X = e_r_corr(traveltime, X[:, i])
+                Rot_X[:, i] = e_r_corr(traveltime, X[:, i])
 
-                # --- Find the elevation angle of the satellite ----------------
-                az[i], el[i], _ = topocent(pos[:3], Rot_X - pos[:3])
+            # --- Find the elevation angles of all satellites ------------------
+            az, el, _ = topocent_batch(pos[:3], Rot_X - pos[:3, np.newaxis])
 
-                if getattr(settings, "useTropCorr", 0) == 1:
-                    # --- Calculate tropospheric correction --------------------
-                    trop = tropo(np.sin(el[i] * dtr), 0.0, 1013.0, 293.0, 50.0, 0.0, 0.0, 0.0)
-                else:
-                    # Do not calculate or apply the tropospheric corrections
-                    trop = 0.0
+            if getattr(settings, "useTropCorr", 0) == 1:
+                # --- Calculate tropospheric correction ------------------------
+                trop = np.array([tropo(np.sin(el[i] * dtr), 0.0, 1013.0, 293.0, 50.0, 0.0, 0.0, 0.0)
+                                 for i in range(n_sats)])
+            else:
+                # Do not calculate or apply the tropospheric corrections
+                trop = np.zeros(n_sats)
 
+        for i in range(n_sats):
             # --- Apply the corrections ----------------------------------------
-            omc[i] = obs[i] - np.linalg.norm(Rot_X - pos[:3]) - pos[3] - trop
+            omc[i] = obs[i] - np.linalg.norm(Rot_X[:, i] - pos[:3]) - pos[3] - trop[i]
 
             # --- Construct the A matrix ---------------------------------------
-            r = np.linalg.norm(Rot_X - pos[:3])
+            r = np.linalg.norm(Rot_X[:, i] - pos[:3])
             if r == 0:
                 A[i, :] = 0  # Avoid division by zero
             else:
-                A[i, :] = [-(Rot_X[0] - pos[0]) / r,
-                           -(Rot_X[1] - pos[1]) / r,
-                           -(Rot_X[2] - pos[2]) / r,
+                A[i, :] = [-(Rot_X[0, i] - pos[0]) / r,
+                           -(Rot_X[1, i] - pos[1]) / r,
+                           -(Rot_X[2, i] - pos[2]) / r,
                            1]
 
         # These lines allow the code to exit gracefully in case of any errors
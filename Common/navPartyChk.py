@@ -1,4 +1,5 @@
 import numpy as np
+from Common.jit import njit
 
 def nav_party_chk(ndat):
     """
@@ -18,12 +19,20 @@ def nav_party_chk(ndat):
         +1 means bits #1-24 have correct polarity, -1 means bits #1-24 must be inverted.
     """
 
+    # The kernel inverts bits in place, so it gets its own integer copy
+    return int(_nav_party_chk(np.array(ndat, dtype=np.int64)))
+
+@njit(cache=True)
+def _nav_party_chk(ndat):
+    """
+    Compiled core of nav_party_chk. ndat must be an int64 array of 32
+    elements; it is modified in place.
+    """
+
     # In order to accomplish the exclusive or operation using multiplication,
     # this program represents a '0' with a '-1' and a '1' with a '1'.
     # See the MATLAB comments for truth table.
 
-    ndat = np.array(ndat, dtype=int)
-
     #--- Check if the data bits must be inverted ------------------------------
     # If D30* (ndat[1]) is not 1, invert bits d1-d24 (ndat[2:26])
     if ndat[1] != 1:
@@ -34,7 +43,7 @@ def nav_party_chk(ndat):
     # ndat[0] = D29*, ndat[1] = D30*, ndat[2:26] = d1-d24, ndat[26:32] = received D25-D30
     # parity contains computed D25-D30 bits
 
-    parity = np.zeros(6, dtype=int)
+    parity = np.zeros(6, dtype=np.int64)
     parity[0] = ndat[0] * ndat[2] * ndat[3] * ndat[4] * ndat[6] * ndat[7] * ndat[11] * ndat[12] * ndat[13] * ndat[14] * ndat[15] * ndat[18] * ndat[19] * ndat[21] * ndat[24]
     parity[1] = ndat[1] * ndat[3] * ndat[4] * ndat[5] * ndat[7] * ndat[8] * ndat[12] * ndat[13] * ndat[14] * ndat[15] * ndat[16] * ndat[19] * ndat[20] * ndat[22] * ndat[25]
     parity[2] = ndat[0] * ndat[2] * ndat[4] * ndat[5] * ndat[6] * ndat[8] * ndat[9] * ndat[13] * ndat[14] * ndat[15] * ndat[16] * ndat[17] * ndat[20] * ndat[21] * ndat[23]
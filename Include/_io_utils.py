@@ -0,0 +1,149 @@
+import os
+import mmap
+import numpy as np
+from Common.jit import njit, prange, NUMBA_AVAILABLE
+
+# Storage type of one sample for each settings.dataType
+_DTYPE_MAP = {
+    'schar': np.int8,
+    'short': np.int16,
+    'float': np.float32,
+}
+
+def sample_dtype(settings):
+    """
+    Returns the NumPy dtype of one sample in the data file, as selected by
+    settings.dataType: one of the names in _DTYPE_MAP, or the NumPy type
+    itself (np.int8, np.int16, np.float32 or their names). Raises ValueError
+    for an unsupported data type.
+    """
+    dataType = settings.dataType
+    if isinstance(dataType, str) and dataType in _DTYPE_MAP:
+        return _DTYPE_MAP[dataType]
+    try:
+        dtype = np.dtype(dataType).type
+    except TypeError:
+        dtype = None
+    if dtype not in _DTYPE_MAP.values():
+        raise ValueError(f"Unsupported dataType: {dataType}")
+    return dtype
+
+def bytes_per_sample(settings):
+    """
+    Returns the size in bytes of one sample in the data file (I and Q count
+    as separate samples).
+    """
+    return np.dtype(sample_dtype(settings)).itemsize
+
+def skip_samples(settings):
+    """
+    Returns the start of processing, settings.skipNumberOfBytes, as a number
+    of samples in the data file (I and Q count as separate samples). Raises
+    ValueError unless it skips whole samples (one sample, or one I/Q pair
+    for fileType 2), which would otherwise mix up the I and Q samples.
+    """
+    itemsize = bytes_per_sample(settings)
+    step = itemsize * (1 if settings.fileType == 1 else 2)
+    if settings.skipNumberOfBytes < 0 or settings.skipNumberOfBytes % step:
+        raise ValueError(f"skipNumberOfBytes must be a non-negative multiple of {step} "
+                         f"bytes, got {settings.skipNumberOfBytes}")
+    return settings.skipNumberOfBytes // itemsize
+
+def open_if_data(settings, offset_bytes, n_samples, dtype):
+    """
+    Memory-maps n_samples raw IF samples of the given dtype from the data
+    file, starting offset_bytes into the file. Only the pages that are
+    actually touched are read from disk. The map is copy-on-write, so callers
+    may modify the samples without touching the file.
+
+    Inputs:
+        settings        - receiver settings (uses fileName).
+        offset_bytes    - byte offset of the first sample in the file.
+        n_samples       - number of samples (I and Q count separately).
+        dtype           - NumPy dtype of one sample.
+    Outputs:
+        data            - np.memmap of length n_samples.
+    """
+    _check_bytes_available(settings.fileName, offset_bytes,
+                           n_samples * np.dtype(dtype).itemsize)
+    data = np.memmap(settings.fileName, dtype=dtype, mode='c',
+                     offset=offset_bytes, shape=(n_samples,))
+    # The mapped range is small and read repeatedly, so ask the kernel to
+    # read all of it ahead (best effort, where madvise is available)
+    if hasattr(mmap, 'MADV_WILLNEED') and getattr(data, '_mmap', None) is not None:
+        try:
+            data._mmap.madvise(mmap.MADV_WILLNEED)
+        except (OSError, ValueError):
+            pass
+    return data
+
+def map_if_file(settings):
+    """
+    Memory-maps the whole data file read-only as an array of samples of
+    settings.dataType. The samples of any part of the record are then
+    slices of this array, read from disk (or the page cache) when touched.
+    The kernel is told that the map is read sequentially.
+
+    Inputs:
+        settings        - receiver settings (uses fileName and dataType).
+    Outputs:
+        data            - np.memmap with all complete samples of the file.
+    """
+    dtype = np.dtype(sample_dtype(settings))
+    n_samples = os.stat(settings.fileName).st_size // dtype.itemsize
+    data = np.memmap(settings.fileName, dtype=dtype, mode='r', shape=(n_samples,))
+    if hasattr(mmap, 'MADV_SEQUENTIAL') and getattr(data, '_mmap', None) is not None:
+        try:
+            data._mmap.madvise(mmap.MADV_SEQUENTIAL)
+        except (OSError, ValueError):
+            pass
+    return data
+
+def _check_bytes_available(path, offset, needed_bytes):
+    """
+    Raises ValueError unless the file holds needed_bytes bytes after offset.
+    Only the file size is looked up; no data is read.
+    """
+    file_size = os.stat(path).st_size
+    available = max(0, file_size - offset)
+    if available < needed_bytes:
+        raise ValueError(
+            f'Could not read enough data from the data file: {needed_bytes} bytes '
+            f'expected from offset {offset}, but only {available} are available '
+            f'({path} has {file_size} bytes).')
+
+def iq_to_complex(data, out=None):
+    """
+    Converts interleaved I/Q samples (I0, Q0, I1, Q1, ...) to a complex64
+    vector. The samples are cast to float32 once and the result is a view of
+    that buffer, instead of building separate I, Q and complex temporaries.
+    With Numba, integer samples are decoded by a compiled kernel instead.
+
+    Inputs:
+        data            - interleaved I/Q samples (int8, int16 or float32).
+        out             - optional complex64 buffer of len(data) // 2
+                          elements to decode into (e.g. reused per block).
+    Outputs:
+        data_cplx       - complex64 vector of len(data) // 2 samples.
+    """
+    # A trailing unpaired sample is dropped
+    data = data[:len(data) - len(data) % 2]
+    if out is not None:
+        if NUMBA_AVAILABLE and data.dtype in (np.int8, np.int16):
+            _iq_to_c64(np.asarray(data), out)
+        else:
+            # The float32 view of a complex64 buffer is interleaved I/Q
+            out.view(np.float32)[:] = data
+        return out
+    if NUMBA_AVAILABLE and data.dtype in (np.int8, np.int16):
+        # Integer samples are decoded straight into the complex64 output
+        # (one pass, multi-threaded) without the float32 staging buffer
+        data_cplx = np.empty(len(data) // 2, dtype=np.complex64)
+        _iq_to_c64(np.asarray(data), data_cplx)
+        return data_cplx
+    return np.ascontiguousarray(data, dtype=np.float32).view(np.complex64)
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _iq_to_c64(src, dst):
+    for i in prange(dst.size):
+        dst[i] = complex(src[2 * i], src[2 * i + 1])
@@ -0,0 +1,44 @@
+"""
+Warm-up of the Numba-compiled kernels.
+
+The first call of an njit function compiles it (or loads it from the
+on-disk cache), which takes from a fraction of a second to a few seconds
+per kernel. pre_run calls _warmup() so that this happens before tracking
+and navigation start, instead of inside their first iteration.
+"""
+
+import numpy as np
+from Common.jit import NUMBA_AVAILABLE
+
+def _warmup():
+    """
+    Calls each compiled kernel once with tiny inputs of the types used by
+    the receiver. Does nothing when Numba is not installed.
+    """
+    if not NUMBA_AVAILABLE:
+        return
+
+    from Include._io_utils import _iq_to_c64
+    from Common.cart2 import _cart2geo, _cart2utm
+    from Common.findUtmZone import _find_utm_zone
+    from Common.navPartyChk import _nav_party_chk
+    from Include.tracking import _tracking_step
+    from Include.satpos import _satpos, EPH_FIELDS
+
+    # I/Q decoding, for both integer sample types
+    for dtype in (np.int8, np.int16):
+        _iq_to_c64(np.zeros(8, dtype=dtype), np.empty(4, dtype=np.complex64))
+
+    # Tracking correlator, for each sample type of the record (real and
+    # I/Q samples share the specialization)
+    caCode = np.ones(1025, dtype=np.int8)
+    for dtype in (np.int8, np.int16, np.float32):
+        _tracking_step(np.zeros(8, dtype=dtype), True, caCode, 0.0, 0.25, 1000.0, 0.0,
+                       4e6, 0.5, 1023, 4)
+
+    # Navigation: satellite positions, parity check and coordinate conversions
+    _satpos(np.zeros(4), np.full((4, len(EPH_FIELDS)), 0.5), False)
+    _nav_party_chk(np.ones(32, dtype=np.int64))
+    _cart2geo(6378137.0, 0.0, 0.0, 4)
+    _cart2utm(6378137.0, 0.0, 0.0, 31)
+    _find_utm_zone(0.0, 0.0)
@@ -99,7 +99,7 @@ def detect_ca_sat(
     if show_status:
         print(f"Beginning Detection of PRN {prn}")
 
-    t_sample = 1.0 / settings.samplingFreq
+    t_sample = settings.sampling_period
     low_freq = -float(settings.acqSearchBand)
     high_freq = float(settings.acqSearchBand)
 
@@ -112,7 +112,7 @@ def detect_ca_sat(
         print(f"Coherent Integrations: {n_coherent}, Non-Coherent Integrations: {n_noncoherent}")
 
     # Samples per code and total sample requirement
-    samples_per_code = int(round(settings.codeLength * settings.samplingFreq / settings.codeFreqBasis))
+    samples_per_code = settings.samples_per_code
     num_codes = 2 * n_coherent * n_noncoherent
     total_samples = samples_per_code * num_codes
 
@@ -214,13 +214,13 @@ def detect_ca_sat_gpu(
     #
     #
     t0 = time.time()
-    t_sample = 1.0 / settings.samplingFreq
+    t_sample = settings.sampling_period
     low_f  = -float(settings.acqSearchBand)
     high_f =  float(settings.acqSearchBand)
     if n_coherent    is None: n_coherent    = int(settings.acqCoherentInt)
     if n_noncoherent is None: n_noncoherent = int(settings.acqNonCohTime)
 
-    samples_per_code = int(round(settings.codeLength * settings.samplingFreq / settings.codeFreqBasis))
+    samples_per_code = settings.samples_per_code
     N = 2 * samples_per_code * n_coherent   # samples per coherent vector; IFFT length / columns
     B = n_noncoherent
     total_samples = samples_per_code * (2 * n_coherent * n_noncoherent)
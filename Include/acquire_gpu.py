@@ -17,13 +17,13 @@ def detect_ca_sat_gpu(
     
 
     t0 = time.time()
-    t_sample = 1.0 / settings.samplingFreq
+    t_sample = settings.sampling_period
     low_f  = -float(settings.acqSearchBand)
     high_f =  float(settings.acqSearchBand)
     if n_coherent    is None: n_coherent    = int(settings.acqCoherentInt)
     if n_noncoherent is None: n_noncoherent = int(settings.acqNonCohTime)
 
-    samples_per_code = int(round(settings.codeLength * settings.samplingFreq / settings.codeFreqBasis))
+    samples_per_code = settings.samples_per_code
     N = 2 * samples_per_code * n_coherent   # samples per coherent vector; IFFT length / columns
     B = n_noncoherent
     total_samples = samples_per_code * (2 * n_coherent * n_noncoherent)
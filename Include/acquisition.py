@@ -1,7 +1,9 @@
 import numpy as np
-from Include.makeCaTable import make_ca_table  
+from dataclasses import replace
+from functools import lru_cache
+from scipy.signal import firwin, upfirdn
+from Include.makeCaTable import make_ca_fft
 from Include.generateCAcode import generate_ca_code  
-from Include.plotAcqSearch import plotAcqSearch
 
 def acquisition(long_signal, settings):
     """
@@ -11,7 +13,12 @@ def acquisition(long_signal, settings):
     and frequency of the detected signals in the "acqResults" structure.
 
     Inputs:
-        long_signal    - 11 ms of raw signal from the front-end
+        long_signal    - raw signal from the front-end (at least 42 ms). It
+                         may be a memory map of the data file; only the
+                         blocks being searched are read at a time. I/Q
+                         data is expected as complex64 (see iq_to_complex):
+                         the search runs in single precision, which is ample
+                         for the 8-16 bit front-end samples.
         settings       - Receiver settings. Provides information about
                          sampling and intermediate frequencies and other
                          parameters including the list of the satellites to
@@ -49,23 +56,25 @@ def acquisition(long_signal, settings):
     # Condition input signal to speed up acquisition
     # If input IF signal freq. is too high, a resampling strategy is applied
     # to speed up the acquisition, which is selectable.
-    # (Not implemented here, placeholder for now)
     #--------------------------------------------------------------------------
+    # The search runs on the downsampled signal; the code phases of the
+    # results are converted back to the original sampling rate
+    long_signal, settings, down = reduce_rate(long_signal, settings)
 
     #--------------------------------------------------------------------------
     # Initialization
     #--------------------------------------------------------------------------
     # Find number of samples per spreading code
-    samples_per_code = int(round(settings.samplingFreq / (settings.codeFreqBasis / settings.codeLength)))
+    samples_per_code = settings.samples_per_code
     # Find sampling period
-    ts = 1 / settings.samplingFreq
+    ts = settings.sampling_period
     # Find phase points of 2ms local carrier wave (1ms for local duplicate,
     # the other 1ms for zero padding)
     phase_points = np.arange(samples_per_code * 2) * 2 * np.pi * ts
-    # Number of the frequency bins for the specified search band
-    number_of_freq_bins = int(round(settings.acqSearchBand * 2 / settings.acqSearchStep) + 1)
     # Carrier frequency bins to be searched
-    coarse_freq_bin = np.zeros(number_of_freq_bins)
+    coarse_freq_bins = settings.IF + settings.acq_doppler_bins
+    # Number of the frequency bins for the specified search band
+    number_of_freq_bins = len(coarse_freq_bins)
 
     #--------------------------------------------------------------------------
     # Initialize acqResults
@@ -80,18 +89,6 @@ def acquisition(long_signal, settings):
         'codePhase': np.zeros(numSats, dtype=int),
         'peakMetric': np.zeros(numSats)
     }
-    #--------------------------------------------------------------------------
-    # Variables for fine acquisition
-    #--------------------------------------------------------------------------
-    # Carrier frequency search step for fine acquisition
-    fine_search_step = 25
-    # Number of the frequency bins for fine acquisition
-    num_of_fine_bins = int(round(settings.acqSearchStep / fine_search_step) + 1)
-    # Carrier frequencies of the fine frequency bins
-    fine_freq_bins = np.zeros(num_of_fine_bins)
-    # Phase points of the local carrier wave
-    fine_phase_points = np.arange(40 * samples_per_code) * 2 * np.pi * ts
-
     #--------------------------------------------------------------------------
     # Input signal power for GLRT statistic calculation
     #--------------------------------------------------------------------------
@@ -104,51 +101,42 @@ def acquisition(long_signal, settings):
     # Perform search for all listed PRN numbers ...
     #--------------------------------------------------------------------------
 
-    # TBD: It would be more efficient to compute the frequency bins
-    # in advance and store them as an array
+    # Local carriers of all coarse frequency bins. They do not depend on the
+    # PRN, so they are generated once for the whole search.
+    sig_carrs = np.exp(-1j * np.outer(coarse_freq_bins, phase_points)).astype(np.complex64)
 
-    start_freq = settings.IF + settings.acqSearchBand
-    stop_freq = settings.IF - settings.acqSearchBand
-    num_freq = 2 * int(settings.acqSearchBand / settings.acqSearchStep) + 1
-    
-    # Create a vector with all the frequencies we will search through
-    coarse_freq_bins = np.linspace(start_freq, stop_freq, num_freq)         
+    # Number of 2ms blocks available for non-coherent integration
+    num_blocks = min(settings.acqNonCohTime, len(long_signal) // samples_per_code - 1)
+    # The 2ms blocks of the non-coherent integration (block k starts k ms
+    # into the signal), sliced once for all satellites
+    blocks = [np.asarray(long_signal[k * samples_per_code:(k + 2) * samples_per_code])
+              for k in range(num_blocks)]
 
+    # Search results of all frequency bins and code shifts (for one
+    # satellite), cleared and reused for each satellite
+    results = np.empty((number_of_freq_bins, samples_per_code * 2), dtype=np.float32)
 
     print('(', end='', flush=True)
     for n in range(numSats - 1):
+        # PRN of the satellite, as a Python int
+        prn = int(settings.acqSatelliteList[n])
         #--------------------------------------------------------------------------
         # Coarse acquisition
         #--------------------------------------------------------------------------
-        # Generate C/A codes and sample them according to the sampling freq.
-        ca_codes_table = make_ca_table(settings.acqSatelliteList[n], settings)
-        ca_codes_2ms = np.concatenate([ca_codes_table, np.zeros(samples_per_code)])
-        # Search results of all frequency bins and code shifts (for one satellite)
-        results = np.zeros((number_of_freq_bins, samples_per_code * 2))
-        # Perform DFT of C/A code
-        ca_code_freq_dom = np.conj(np.fft.fft(ca_codes_2ms))
-
-        # Test the correlation for each frequency bin
-        # this is the pythonic way of iterating over all possible frequencies
-        # freq_idx goes from 0 to num_freq-1
-        # coarse_freq counts through the test frequencies
-        for freq_idx, coarse_freq in enumerate(coarse_freq_bins):
-            # Generate carrier wave frequency grid
-            # coarse_freq_bin[freq_bin_index] = settings.IF + settings.acqSearchBand - settings.acqSearchStep * freq_bin_index
-            # Generate local sine and cosine
-            sig_carr = np.exp(-1j * coarse_freq * phase_points)
-            # Do correlation
-            for non_coh_index in range(settings.acqNonCohTime):
-                idx_start = non_coh_index * samples_per_code
-                idx_end = (non_coh_index + 2) * samples_per_code
-                signal = long_signal[idx_start:idx_end]
-                if len(signal) < samples_per_code * 2:
-                    continue
-                # "Remove carrier" from the signal
-                I = np.real(sig_carr * signal)
-                Q = np.imag(sig_carr * signal)
-                # Convert the baseband signal to frequency domain
-                IQ_freq_dom = np.fft.fft(I + 1j * Q)
+        results.fill(0)
+        # DFT of the sampled C/A code (computed once per sampling setup)
+        ca_code_freq_dom = make_ca_fft(prn, settings)
+
+        # The input is processed block by block: each 2ms block is read once
+        # (long_signal may be a memory map of the data file) and correlated
+        # against all frequency bins while it is still in cache.
+        for signal in blocks:
+            # Test the correlation for each frequency bin
+            # freq_idx goes from 0 to number_of_freq_bins-1
+            for freq_idx, sig_carr in enumerate(sig_carrs):
+                # "Remove carrier" from the signal and convert the baseband
+                # signal to frequency domain
+                IQ_freq_dom = np.fft.fft(sig_carr * signal)
                 # Multiplication in the frequency domain (correlation in time domain)
                 conv_code_IQ = IQ_freq_dom * ca_code_freq_dom
                 # Perform inverse DFT and store correlation results
@@ -171,48 +159,23 @@ def acquisition(long_signal, settings):
         #
         # Plot the coarse search results
         #
-        plotAcqSearch(settings.acqSatelliteList[n],settings, results)
+        if settings.plotAcquisition:
+            from Include.plotAcqSearch import plotAcqSearch
+            plotAcqSearch(prn,settings, results)
         #--------------------------------------------------------------------------
         # If the result is above threshold, then there is a signal ...
         # Fine carrier frequency search
         #--------------------------------------------------------------------------
         if acqResults['peakMetric'][n] > settings.acqThreshold:
             # Indicate PRN number of the detected signal
-            print(f'{settings.acqSatelliteList[n]:02d} ', end='', flush=True)
-            # Prepare 20ms code, carrier and input signals
-            ca_code = generate_ca_code(settings.acqSatelliteList[n])
-            code_value_index = np.floor(ts * np.arange(40 * samples_per_code) / (1 / settings.codeFreqBasis)).astype(int)
-            ca_code_40ms = ca_code[np.mod(code_value_index, settings.codeLength)]
-            # Take 40ms incoming signal for fine acquisition
-            sig_40ms = long_signal[code_phase:code_phase + 40 * samples_per_code]
-            # Search different fine freq bins
-            fine_result = np.zeros(num_of_fine_bins)
-            for fine_bin_index in range(num_of_fine_bins):
-                # Carrier frequencies of the frequency bins
-                fine_freq_bins[fine_bin_index] = coarse_freq - fine_search_step * fine_bin_index
-                # Local carrier signal
-                sig_carr_40ms = np.exp(-1j * fine_freq_bins[fine_bin_index] * fine_phase_points)
-                # Wipe off code and carrier from incoming signals
-                baseband_sig = sig_40ms * ca_code_40ms * sig_carr_40ms
-                # Coherent integration for each code
-                sum_per_code = np.array([
-                    np.sum(baseband_sig[i * samples_per_code:(i + 1) * samples_per_code])
-                    for i in range(40)
-                ])
-                # Search Nav bit edge for 20 cases of Nav bit edge
-                max_power = 0
-                for com_index in range(20):
-                    # Power for 20ms coherent integration
-                    com_power = np.abs(np.sum(sum_per_code[com_index:com_index + 20]))
-                    # Maximal integration power
-                    max_power = max(max_power, com_power)
-                fine_result[fine_bin_index] = max_power
-            # Find the fine carrier freq.
-            max_fin_bin = np.argmax(fine_result)
-            acqResults['carrFreq'][n] = fine_freq_bins[max_fin_bin]
-            # Save code phase acquisition result
-            acqResults['codePhase'][n] = code_phase
-            acqResults['PRN'][n] = settings.acqSatelliteList[n]
+            print(f'{prn:02d} ', end='', flush=True)
+            # Fine carrier frequency search around the coarse peak
+            acqResults['carrFreq'][n] = fine_freq_search(
+                long_signal, prn, coarse_freq, code_phase, settings)
+            # Save code phase acquisition result (at the original sampling
+            # rate)
+            acqResults['codePhase'][n] = int(code_phase) * down
+            acqResults['PRN'][n] = prn
             # signal found, if IF =0 just change to 1 Hz to allow processing
             if acqResults['carrFreq'][n] == 0:
                 acqResults['carrFreq'][n] = 1
@@ -225,3 +188,123 @@ def acquisition(long_signal, settings):
     #--------------------------------------------------------------------------
     print(')')
     return acqResults
+
+
+def reduce_rate(long_signal, settings):
+    """
+    Downsamples the signal for the acquisition search if settings.resamplingflag
+    is on and the sampling rate is above settings.resamplingThreshold.
+
+    Inputs:
+        long_signal    - raw signal from the front-end.
+        settings       - Receiver settings.
+    Outputs:
+        long_signal    - the signal at the reduced rate (the input if it is
+                         not downsampled).
+        settings       - copy of the settings with the reduced samplingFreq
+                         (the input settings if the signal is not downsampled).
+        down           - decimation factor (1 if not downsampled); code phases
+                         found at the reduced rate are multiplied by it.
+    """
+    down = 1
+    if settings.resamplingflag and settings.samplingFreq > settings.resamplingThreshold:
+        max_freq = abs(settings.IF) + settings.acqSearchBand + settings.codeFreqBasis
+        down, taps = _decimator(settings.samplingFreq, settings.resamplingThreshold, max_freq)
+    if down > 1:
+        long_signal = _downsample(long_signal, down, taps)
+        settings = replace(settings, samplingFreq=settings.samplingFreq / down)
+    return long_signal, settings, down
+
+@lru_cache(maxsize=8)
+def _decimator(samplingFreq, resamplingThreshold, maxFreq):
+    """
+    Designs the downsampling of the signal for the coarse search: returns
+    the integer decimation factor which brings the sampling rate to
+    resamplingThreshold or below, and the taps of the FIR anti-aliasing
+    filter applied before decimation. The factor is reduced while the
+    signal band (frequencies up to maxFreq, main lobe and Doppler search
+    band included) would not stay within the pass band of the filter; a
+    factor of 1 means no downsampling (taps is then None).
+    """
+    down = int(np.ceil(samplingFreq / resamplingThreshold))
+    # The pass band ends at 80% and the cut-off is at 90% of the new
+    # Nyquist frequency
+    while down > 1 and maxFreq > 0.8 * samplingFreq / down / 2:
+        down -= 1
+    if down == 1:
+        return 1, None
+    taps = firwin(32 * down + 1, 0.9 / down).astype(np.float32)
+    taps.flags.writeable = False
+    return down, taps
+
+def _downsample(long_signal, down, taps):
+    """
+    Filters the signal with the FIR taps and keeps every down-th sample.
+    Sample m of the result is aligned with sample m * down of the input
+    (the delay of the linear phase filter is removed).
+    """
+    delay = (len(taps) - 1) // 2 // down
+    filtered = upfirdn(taps, np.asarray(long_signal), 1, down)
+    dtype = np.complex64 if np.iscomplexobj(filtered) else np.float32
+    return filtered[delay:delay + len(long_signal) // down].astype(dtype)
+
+def fine_freq_search(long_signal, prn, coarse_freq, code_phase, settings):
+    """
+    Refines the carrier frequency of a detected signal. 40ms of the input
+    signal, aligned to the code phase, are wiped off with the C/A code and
+    with carriers in 25Hz steps below the coarse frequency; the frequency
+    with the highest 20ms coherent power (over all Nav bit edge positions)
+    is returned.
+
+    Inputs:
+        long_signal    - raw signal from the front-end (at least 42 ms).
+        prn            - PRN number of the detected signal.
+        coarse_freq    - carrier frequency found by the coarse search.
+        code_phase     - code phase found by the coarse search.
+        settings       - receiver settings.
+    Outputs:
+        carrFreq       - fine carrier frequency of the signal.
+    """
+    samples_per_code = settings.samples_per_code
+    ts = settings.sampling_period
+    # --- Variables for fine acquisition ---
+    # Carrier frequency search step for fine acquisition
+    fine_search_step = 25
+    # Number of the frequency bins for fine acquisition
+    num_of_fine_bins = int(round(settings.acqSearchStep / fine_search_step) + 1)
+    # Carrier frequencies of the fine frequency bins
+    fine_freq_bins = np.zeros(num_of_fine_bins)
+    # Phase points of the local carrier wave
+    fine_phase_points = np.arange(40 * samples_per_code) * 2 * np.pi * ts
+
+    # Prepare 20ms code, carrier and input signals
+    ca_code = generate_ca_code(prn)
+    code_value_index = np.floor(ts * np.arange(40 * samples_per_code) / (1 / settings.codeFreqBasis)).astype(int)
+    ca_code_40ms = ca_code[np.mod(code_value_index, settings.codeLength)].astype(np.float32)
+    # Take 40ms incoming signal for fine acquisition
+    sig_40ms = np.asarray(long_signal[code_phase:code_phase + 40 * samples_per_code])
+    # Search different fine freq bins
+    fine_result = np.zeros(num_of_fine_bins)
+    for fine_bin_index in range(num_of_fine_bins):
+        # Carrier frequencies of the frequency bins
+        fine_freq_bins[fine_bin_index] = coarse_freq - fine_search_step * fine_bin_index
+        # Local carrier signal
+        sig_carr_40ms = np.exp(-1j * fine_freq_bins[fine_bin_index] * fine_phase_points).astype(np.complex64)
+        # Wipe off code and carrier from incoming signals
+        baseband_sig = sig_40ms * ca_code_40ms * sig_carr_40ms
+        # Coherent integration for each code
+        sum_per_code = np.array([
+            np.sum(baseband_sig[i * samples_per_code:(i + 1) * samples_per_code])
+            for i in range(40)
+        ])
+        # Search Nav bit edge for 20 cases of Nav bit edge
+        max_power = 0
+        for com_index in range(20):
+            # Power for 20ms coherent integration
+            com_power = np.abs(np.sum(sum_per_code[com_index:com_index + 20]))
+            # Maximal integration power
+            max_power = max(max_power, com_power)
+        fine_result[fine_bin_index] = max_power
+    # Find the fine carrier freq.
+    max_fin_bin = np.argmax(fine_result)
+    return fine_freq_bins[max_fin_bin]
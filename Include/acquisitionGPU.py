@@ -0,0 +1,118 @@
+import numpy as np
+import cupy as cp
+from Include.makeCaTable import make_ca_fft
+from Include.acquisition import fine_freq_search, reduce_rate
+
+def acquisition_gpu(long_signal, settings):
+    """
+    CUDA version of acquisition (same inputs and outputs). The coarse
+    code phase / frequency search of all PRNs in settings.acqSatelliteList
+    runs on the GPU with CuPy: the signal is uploaded once as complex64, the
+    C/A code FFTs of all PRNs are uploaded as one 2D array, and every 2ms
+    block is mixed with all frequency bins and correlated with all codes
+    before the results are reduced on the device. Only the peak values and
+    their positions are copied back; the fine frequency search of the
+    detected signals runs on the CPU (fine_freq_search). With
+    settings.resamplingflag on, the signal is downsampled first, as in
+    acquisition (reduce_rate).
+
+    Inputs:
+        long_signal    - raw signal from the front-end (at least 42 ms).
+        settings       - Receiver settings (the search runs on the CUDA
+                         device settings.gpuDevice).
+    Outputs:
+        acqResults     - code phases and frequencies of the detected signals,
+                         see acquisition.
+    """
+
+    #--------------------------------------------------------------------------
+    # Initialization
+    #--------------------------------------------------------------------------
+    # The search runs on the downsampled signal; the code phases of the
+    # results are converted back to the original sampling rate
+    long_signal, settings, down = reduce_rate(long_signal, settings)
+    samples_per_code = settings.samples_per_code
+    prn_list = np.asarray(settings.acqSatelliteList).tolist()
+    numSats = len(prn_list) + 1
+    acqResults = {
+        'PRN': np.zeros(numSats),
+        'carrFreq': np.zeros(numSats),
+        'codePhase': np.zeros(numSats, dtype=int),
+        'peakMetric': np.zeros(numSats)
+    }
+
+    # Carrier frequency bins to be searched
+    coarse_freq_bins = settings.IF + settings.acq_doppler_bins
+    num_freq = len(coarse_freq_bins)
+
+    # Number of 2ms blocks available for non-coherent integration
+    num_blocks = min(settings.acqNonCohTime, len(long_signal) // samples_per_code - 1)
+
+    # Input signal power for GLRT statistic calculation
+    sig_power = np.sqrt(np.var(long_signal[:samples_per_code], ddof=1) * samples_per_code)
+
+    #--------------------------------------------------------------------------
+    # Move data to the GPU
+    #--------------------------------------------------------------------------
+    # All arrays below are allocated on the selected device
+    cp.cuda.Device(settings.gpuDevice).use()
+    # Input signal, uploaded once
+    d_signal = cp.asarray(np.asarray(long_signal[:(num_blocks + 1) * samples_per_code]),
+                          dtype=cp.complex64)
+    # Local carriers of all frequency bins (2ms, as in acquisition)
+    phase_points = cp.arange(samples_per_code * 2) * (2 * np.pi / settings.samplingFreq)
+    d_carriers = cp.exp(-1j * cp.outer(cp.asarray(coarse_freq_bins), phase_points)).astype(cp.complex64)
+    # Conjugate DFTs of the zero padded 1ms C/A codes of all PRNs (cached
+    # on the host, uploaded as one 2D array)
+    d_ca_code_freq_dom = cp.asarray(np.stack([make_ca_fft(prn, settings) for prn in prn_list]))
+
+    #--------------------------------------------------------------------------
+    # Coarse acquisition of all PRNs
+    #--------------------------------------------------------------------------
+    # Search results of all PRNs, frequency bins and code shifts
+    d_results = cp.zeros((len(prn_list), num_freq, samples_per_code * 2), dtype=cp.float32)
+    for non_coh_index in range(num_blocks):
+        idx_start = non_coh_index * samples_per_code
+        d_block = d_signal[idx_start:idx_start + samples_per_code * 2]
+        # "Remove carrier" of all frequency bins and convert to frequency domain
+        d_IQ_freq_dom = cp.fft.fft(d_carriers * d_block, axis=1)
+        for freq_idx in range(num_freq):
+            # Correlation with all codes at once (multiplication in the
+            # frequency domain), non-coherent integration
+            d_conv_code_IQ = d_ca_code_freq_dom * d_IQ_freq_dom[freq_idx]
+            d_results[:, freq_idx, :] += cp.abs(cp.fft.ifft(d_conv_code_IQ, axis=1))
+
+    # Correlation peaks, with their frequency bin and code phase
+    d_peak_per_freq = d_results.max(axis=2)
+    peak_size = cp.asnumpy(d_peak_per_freq.max(axis=1))
+    coarse_freq_idx = cp.asnumpy(d_peak_per_freq.argmax(axis=1))
+    code_phases = cp.asnumpy(d_results.max(axis=1).argmax(axis=1))
+    # Store GLRT statistic
+    acqResults['peakMetric'][:-1] = peak_size / sig_power / settings.acqNonCohTime
+
+    #--------------------------------------------------------------------------
+    # Fine carrier frequency search of the detected signals
+    #--------------------------------------------------------------------------
+    print('(', end='', flush=True)
+    for n, prn in enumerate(prn_list):
+        if settings.plotAcquisition:
+            from Include.plotAcqSearch import plotAcqSearch
+            plotAcqSearch(prn, settings, cp.asnumpy(d_results[n]))
+
+        if acqResults['peakMetric'][n] > settings.acqThreshold:
+            # Indicate PRN number of the detected signal
+            print(f'{prn:02d} ', end='', flush=True)
+            code_phase = int(code_phases[n])
+            acqResults['carrFreq'][n] = fine_freq_search(
+                long_signal, prn, coarse_freq_bins[coarse_freq_idx[n]], code_phase, settings)
+            # Code phase at the original sampling rate
+            acqResults['codePhase'][n] = code_phase * down
+            acqResults['PRN'][n] = prn
+            # signal found, if IF =0 just change to 1 Hz to allow processing
+            if acqResults['carrFreq'][n] == 0:
+                acqResults['carrFreq'][n] = 1
+        else:
+            # No signal with this PRN
+            print('. ', end='', flush=True)
+    print(')')
+    return acqResults
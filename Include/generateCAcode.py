@@ -1,4 +1,40 @@
 import numpy as np
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def _g1_g2_codes():
+    """
+    Generates the G1 and G2 code sequences (chips of +-1) from which all
+    C/A codes are formed. They do not depend on the PRN, so they are
+    generated once and returned as read-only arrays.
+    """
+    #--- Generate G1 code -----------------------------------------------------
+    #--- Initialize g1 output to speed up the function ---
+    g1 = np.zeros(1023)
+    #--- Load shift register ---
+    reg = -1 * np.ones(10)
+    #--- Generate all G1 signal chips based on the G1 feedback polynomial -----
+    for i in range(1023):
+        g1[i] = reg[9]
+        saveBit = reg[2] * reg[9]
+        reg[1:10] = reg[0:9]
+        reg[0] = saveBit
+
+    #--- Generate G2 code -----------------------------------------------------
+    #--- Initialize g2 output to speed up the function ---
+    g2 = np.zeros(1023)
+    #--- Load shift register ---
+    reg = -1 * np.ones(10)
+    #--- Generate all G2 signal chips based on the G2 feedback polynomial -----
+    for i in range(1023):
+        g2[i] = reg[9]
+        saveBit = reg[1] * reg[2] * reg[5] * reg[7] * reg[8] * reg[9]
+        reg[1:10] = reg[0:9]
+        reg[0] = saveBit
+
+    g1.flags.writeable = False
+    g2.flags.writeable = False
+    return g1, g2
 
 def generate_ca_code(PRN):
     """
@@ -62,29 +98,8 @@ def generate_ca_code(PRN):
     #--- Pick right shift for the given PRN number ----------------------------
     g2shift = g2s[PRN - 1]  # Python uses 0-based indexing
 
-    #--- Generate G1 code -----------------------------------------------------
-    #--- Initialize g1 output to speed up the function ---
-    g1 = np.zeros(1023)
-    #--- Load shift register ---
-    reg = -1 * np.ones(10)
-    #--- Generate all G1 signal chips based on the G1 feedback polynomial -----
-    for i in range(1023):
-        g1[i] = reg[9]
-        saveBit = reg[2] * reg[9]
-        reg[1:10] = reg[0:9]
-        reg[0] = saveBit
-
-    #--- Generate G2 code -----------------------------------------------------
-    #--- Initialize g2 output to speed up the function ---
-    g2 = np.zeros(1023)
-    #--- Load shift register ---
-    reg = -1 * np.ones(10)
-    #--- Generate all G2 signal chips based on the G2 feedback polynomial -----
-    for i in range(1023):
-        g2[i] = reg[9]
-        saveBit = reg[1] * reg[2] * reg[5] * reg[7] * reg[8] * reg[9]
-        reg[1:10] = reg[0:9]
-        reg[0] = saveBit
+    #--- G1 and G2 codes (the same for all PRNs, generated once) -------------
+    g1, g2 = _g1_g2_codes()
 
     #--- Shift G2 code --------------------------------------------------------
     # The idea: g2 = concatenate[ g2_right_part, g2_left_part ];
@@ -93,3 +108,24 @@ def generate_ca_code(PRN):
     #--- Form single sample C/A code by multiplying G1 and G2 -----------------
     CAcode = -(g1 * g2)
     return CAcode
+
+@lru_cache(maxsize=32)
+def get_ca(PRN):
+    """
+    get_ca returns the C/A code of PRN with one extra chip at each end (the
+    last chip before the first and the first chip after the last), as used
+    for the early and late code replicas in tracking. The codes are
+    generated once per PRN and cached; the returned array is read-only and
+    shared by all callers.
+
+    CAcode = get_ca(PRN)
+
+    Inputs:
+        PRN         - PRN number of the sequence.
+    Outputs:
+        CAcode      - the padded C/A code (1025 int8 chips of +-1).
+    """
+    CAcode = generate_ca_code(PRN).astype(np.int8)
+    CAcode = np.concatenate([CAcode[-1:], CAcode, CAcode[:1]])
+    CAcode.flags.writeable = False
+    return CAcode
@@ -1,5 +1,7 @@
 import numpy as np
+from functools import lru_cache
 from .generateCAcode import generate_ca_code
+from init_settings import Settings
 
 def make_ca_table(PRN, settings):
     """
@@ -45,12 +47,10 @@ def make_ca_table(PRN, settings):
     """
 
     #--- Find number of samples per spreading code ----------------------------
-    samples_per_code = int(round(
-        settings.samplingFreq / (settings.codeFreqBasis / settings.codeLength)
-    ))
+    samples_per_code = settings.samples_per_code
 
     #--- Find time constants --------------------------------------------------
-    ts = 1 / settings.samplingFreq   # Sampling period in sec
+    ts = settings.sampling_period    # Sampling period in sec
     tc = 1 / settings.codeFreqBasis  # C/A chip period in sec
 
     #--- Generate CA code for given PRN ---------------------------------------
@@ -74,3 +74,31 @@ def make_ca_table(PRN, settings):
     ca_codes_table = ca_code[code_value_index - 1]
 
     return ca_codes_table
+
+def make_ca_fft(PRN, settings):
+    """
+    Returns the conjugate DFT of the digitized C/A code of the given PRN,
+    zero padded to 2 code periods, as used by the acquisition correlation.
+    The codes are fixed for a given sampling setup, so each one is computed
+    once and cached; the returned array is read-only.
+
+    Inputs:
+        PRN             - specified PRN for C/A code
+        settings        - receiver settings object (samplingFreq,
+                          codeFreqBasis and codeLength are used)
+    Outputs:
+        ca_code_fft     - complex64 array of 2 * samples_per_code elements
+    """
+    return _ca_fft_cached(int(PRN), float(settings.samplingFreq),
+                          float(settings.codeFreqBasis), int(settings.codeLength))
+
+@lru_cache(maxsize=64)
+def _ca_fft_cached(PRN, samplingFreq, codeFreqBasis, codeLength):
+    settings = Settings(samplingFreq=samplingFreq, codeFreqBasis=codeFreqBasis,
+                        codeLength=codeLength)
+    samples_per_code = settings.samples_per_code
+    ca_codes_2ms = np.zeros(samples_per_code * 2, dtype=np.float32)
+    ca_codes_2ms[:samples_per_code] = make_ca_table(PRN, settings)
+    ca_code_fft = np.conj(np.fft.fft(ca_codes_2ms))
+    ca_code_fft.flags.writeable = False
+    return ca_code_fft
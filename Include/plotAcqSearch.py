@@ -25,7 +25,7 @@ def plotAcqSearch(PRN, settings, results, out_dir=None, dpi=1200, freq_list = No
     if (np.iscomplexobj (Z)):
           Z = np.abs(Z)
 
-    samples_per_code = int(round(settings.samplingFreq / (settings.codeFreqBasis / settings.codeLength)))
+    samples_per_code = settings.samples_per_code
 
     # Create a vector with the frequency steps
     # start_freq = settings.IF - settings.acqSearchBand
@@ -41,7 +41,7 @@ def plotAcqSearch(PRN, settings, results, out_dir=None, dpi=1200, freq_list = No
          freq_axis = freq_list
 
  
-    samples_per_chip = settings.samplingFreq / settings.codeFreqBasis
+    samples_per_chip = settings.samples_per_chip
     chip_axis = np.arange(nsamples) * 1 / samples_per_chip
 
     flat_idx = np.argmax(Z)
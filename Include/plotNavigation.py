@@ -1,49 +1,42 @@
-import matplotlib.pyplot as plt
+from concurrent.futures import ThreadPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle
 import numpy as np
 import os
 
 def plotNavigation(navSolutions, settings):
     """
-    Saves navigation plots as .jpg files in the plots directory.
+    Saves navigation plots as .jpg files in the plots directory. The
+    coordinate variations, the 2D positions and the sky plot are independent
+    figures, rendered and saved concurrently as navigation_coordinates.jpg,
+    navigation_positions.jpg and navigation_skyplot.jpg (they replace the
+    single navigation_combined.jpg).
     Args:
-        navSolutions: list or dict with navigation solution arrays
+        navSolutions: structured ndarray (from postNavigation) or dict with navigation solution arrays
         settings: receiver settings (should have .truePosition with E/N/U)
     """
     if navSolutions is None or len(navSolutions) == 0:
         print('plotNavigation: No navigation data to plot.')
         return
 
-    # Handle both list and dict formats - but extract properly for sky plot
-    if isinstance(navSolutions, list):
-        # If it's a list, assume each entry has the fields we need
-        if len(navSolutions) == 0:
-            print('plotNavigation: No navigation data to plot.')
-            return
-        
-        # Extract arrays from list of navigation solutions
-        E = np.array([sol.get('E', np.nan) for sol in navSolutions if sol is not None])
-        N = np.array([sol.get('N', np.nan) for sol in navSolutions if sol is not None])
-        U = np.array([sol.get('U', np.nan) for sol in navSolutions if sol is not None])
-        longitude = np.array([sol.get('longitude', np.nan) for sol in navSolutions if sol is not None])
-        latitude = np.array([sol.get('latitude', np.nan) for sol in navSolutions if sol is not None])
-        height = np.array([sol.get('height', np.nan) for sol in navSolutions if sol is not None])
-        DOP = np.array([sol.get('DOP', [np.nan, np.nan]) for sol in navSolutions if sol is not None])
-        
-        # For sky plot, get all unique satellites from the last solution
-        if navSolutions and 'az' in navSolutions[-1]:
-            last_solution = navSolutions[-1]
-            az_data = last_solution['az']
-            el_data = last_solution['el']
-            prn_data = last_solution['PRN']
-            
-            # Convert to numpy arrays and handle empty cases
-            az = np.array(az_data) if len(az_data) > 0 else np.array([])
-            el = np.array(el_data) if len(el_data) > 0 else np.array([])
-            PRN = np.array(prn_data) if len(prn_data) > 0 else np.array([])
-        else:
-            az = np.array([])
-            el = np.array([])
-            PRN = np.array([])
+    # Handle both the structured ndarray and dict formats
+    if isinstance(navSolutions, np.ndarray):
+        # One row per measurement; columns are read directly as views
+        E = navSolutions['E']
+        N = navSolutions['N']
+        U = navSolutions['U']
+        longitude = navSolutions['longitude']
+        latitude = navSolutions['latitude']
+        height = navSolutions['height']
+        # DOP is stored one row per measurement; plotting expects one row per DOP type
+        DOP = navSolutions['DOP'].T
+
+        # For sky plot, use the satellites of the last solution (skip unused slots)
+        last_solution = navSolutions[-1]
+        used = last_solution['PRN'] != 0
+        az = last_solution['az'][used]
+        el = last_solution['el'][used]
+        PRN = last_solution['PRN'][used]
     else:
         # Original dict format
         E = np.array(navSolutions.get('E', []))
@@ -57,7 +50,7 @@ def plotNavigation(navSolutions, settings):
         el = navSolutions.get('el', np.array([]))
         PRN = navSolutions.get('PRN', np.array([]))
 
-    if (np.isnan(settings.truePosition.E) or np.isnan(settings.truePosition.N) or np.isnan(settings.truePosition.U)):
+    if not settings.truePosition.valid:
         refCoord = {
             'E': np.nanmean(E),
             'N': np.nanmean(N),
@@ -72,27 +65,57 @@ def plotNavigation(navSolutions, settings):
         }
         refPointLgText = 'Reference Position'
 
+    # Coordinate offsets from the reference point (shared by Plot 1 and Plot 2)
+    dE = E - refCoord['E']
+    dN = N - refCoord['N']
+    dU = U - refCoord['U']
+
     # Create plots directory if it doesn't exist
     plots_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'plots')
     os.makedirs(plots_dir, exist_ok=True)
-    
-    # Create a single figure with multiple subplots
-    fig = plt.figure(figsize=(16, 12))
-    
-    # Plot 1: Coordinate Variations (top)
-    ax1 = plt.subplot(3, 2, (1, 2))  # Span across top two columns
-    ax1.plot(E - refCoord['E'], label='E', linewidth=1)
-    ax1.plot(N - refCoord['N'], label='N', linewidth=1)
-    ax1.plot(U - refCoord['U'], label='U', linewidth=1)
+
+    # The figures are built with the object-oriented API (no pyplot state), so
+    # each one can be rasterized in its own thread; Agg releases the GIL.
+    figures = {
+        'navigation_coordinates.jpg': _plot_coord_var(dE, dN, dU, settings),
+        'navigation_positions.jpg': _plot_2d(dE, dN, latitude, longitude, height, refPointLgText),
+        'navigation_skyplot.jpg': _plot_sky(az, el, PRN, DOP),
+    }
+
+    def save(item):
+        filename, fig = item
+        fig.savefig(os.path.join(plots_dir, filename), dpi=300, bbox_inches='tight')
+        return filename
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        for filename in executor.map(save, figures.items()):
+            print(f'   Saved navigation plot: {filename}')
+    print(f'   Navigation plot saved to: {plots_dir}')
+
+def _plot_coord_var(dE, dN, dU, settings):
+    """
+    Plot 1: Coordinate variations in the UTM system.
+    """
+    fig = Figure(figsize=(16, 4))
+    ax1 = fig.add_subplot()
+    ax1.plot(dE, label='E', linewidth=1)
+    ax1.plot(dN, label='N', linewidth=1)
+    ax1.plot(dU, label='U', linewidth=1)
     ax1.set_title('Coordinates variations in UTM system')
     ax1.set_xlabel(f'Measurement period: {settings.navSolPeriod}ms')
     ax1.set_ylabel('Variations (m)')
     ax1.grid(True)
     ax1.legend()
-    
-    # Plot 2: 2D Position Plot (bottom left)
-    ax2 = plt.subplot(3, 2, (3, 5))  # Left column, spans middle and bottom
-    ax2.plot(E - refCoord['E'], N - refCoord['N'], '+', markersize=4, label='Measurements')
+    fig.tight_layout()
+    return fig
+
+def _plot_2d(dE, dN, latitude, longitude, height, refPointLgText):
+    """
+    Plot 2: 2D positions relative to the reference point.
+    """
+    fig = Figure(figsize=(8, 8))
+    ax2 = fig.add_subplot()
+    ax2.plot(dE, dN, '+', markersize=4, label='Measurements')
     ax2.scatter(0, 0, c='r', marker='+', s=80, label=refPointLgText)
     ax2.set_title('Positions in UTM system (3D plot)')
     ax2.set_xlabel('East (m)')
@@ -102,30 +125,34 @@ def plotNavigation(navSolutions, settings):
     ax2.axis('equal')
     
     # Add mean position text
-    if len(navSolutions) > 0:
+    if len(latitude) > 0:
         mean_lat = np.nanmean(latitude)
         mean_lon = np.nanmean(longitude) 
         mean_height = np.nanmean(height)
         
-        # Convert latitude to degrees, minutes, seconds
-        lat_deg = int(abs(mean_lat))
-        lat_min = int((abs(mean_lat) - lat_deg) * 60)
-        lat_sec = ((abs(mean_lat) - lat_deg) * 60 - lat_min) * 60
+        # Convert latitude to degrees, minutes, seconds (working in arc seconds)
+        lat_deg, lat_rem = divmod(abs(mean_lat) * 3600, 3600)
+        lat_min, lat_sec = divmod(lat_rem, 60)
         lat_hemisphere = 'N' if mean_lat >= 0 else 'S'
         
         # Convert longitude to degrees, minutes, seconds
-        lon_deg = int(abs(mean_lon))
-        lon_min = int((abs(mean_lon) - lon_deg) * 60)
-        lon_sec = ((abs(mean_lon) - lon_deg) * 60 - lon_min) * 60
+        lon_deg, lon_rem = divmod(abs(mean_lon) * 3600, 3600)
+        lon_min, lon_sec = divmod(lon_rem, 60)
         lon_hemisphere = 'E' if mean_lon >= 0 else 'W'
         
         # Add text box with position info in DMS format
-        info_text = f"Measurements\nMean Position\nLat: {lat_deg}°{lat_min:02d}'{lat_sec:05.2f}\"{lat_hemisphere}\nLng: {lon_deg}°{lon_min:02d}'{lon_sec:05.2f}\"{lon_hemisphere}\nHgt: {mean_height:.1f}m"
+        info_text = f"Measurements\nMean Position\nLat: {lat_deg:.0f}°{lat_min:02.0f}'{lat_sec:05.2f}\"{lat_hemisphere}\nLng: {lon_deg:.0f}°{lon_min:02.0f}'{lon_sec:05.2f}\"{lon_hemisphere}\nHgt: {mean_height:.1f}m"
         ax2.text(0.02, 0.98, info_text, transform=ax2.transAxes, 
                 verticalalignment='top', bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.8))
-    
-    # Plot 3: Sky Plot (bottom right)
-    ax3 = plt.subplot(3, 2, (4, 6))  # Right column, spans middle and bottom
+    fig.tight_layout()
+    return fig
+
+def _plot_sky(az, el, PRN, DOP):
+    """
+    Plot 3: Sky plot of the satellites of the last solution.
+    """
+    fig = Figure(figsize=(8, 8))
+    ax3 = fig.add_subplot()
     
     # Create a polar-like sky plot with better definition
     angles = np.linspace(0, 2*np.pi, 360)
@@ -204,7 +231,7 @@ def plotNavigation(navSolutions, settings):
     ax3.axis('off')
     
     # Add a subtle background
-    ax3.add_patch(plt.Circle((0, 0), 1, color='lightgray', alpha=0.1, zorder=-1))
+    ax3.add_patch(Circle((0, 0), 1, color='lightgray', alpha=0.1, zorder=-1))
     
     # Add PDOP info
     if DOP.size > 0:
@@ -217,12 +244,6 @@ def plotNavigation(navSolutions, settings):
         ax3.set_title(f'Sky plot (mean PDOP: {mean_pdop:.2f})')
     else:
         ax3.set_title('Sky plot')
-    
-    plt.tight_layout()
-    
-    # Save the combined navigation plot
-    filepath = os.path.join(plots_dir, 'navigation_combined.jpg')
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    plt.close()
-    print(f'   Saved navigation plot: navigation_combined.jpg')
-    print(f'   Navigation plot saved to: {plots_dir}')
+
+    fig.tight_layout()
+    return fig
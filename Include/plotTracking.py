@@ -1,10 +1,14 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 import numpy as np
 import os
 
 def plotTracking(channelList, trackResults, settings):
     """
     Saves tracking plots for each channel as .jpg files in the plots directory.
+    The plots are drawn without pyplot (no GUI backend is involved) and the
+    same two figures are redrawn for every channel.
     Args:
         channelList: list of channel indices to plot
         trackResults: list/dict of tracking results per channel
@@ -23,22 +27,44 @@ def plotTracking(channelList, trackResults, settings):
     plots_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'plots')
     os.makedirs(plots_dir, exist_ok=True)
     
+    timeAxisInSeconds = np.arange(1, settings.msToProcess+1) / 1000.0
+
+    # Create the figures once, with custom subplot layout - 3x3 grid with
+    # some plots spanning 2 columns
+    # Top row: scatter plot (1 unit) + nav message (2 units)
+    # Middle row: PLL plots (1 unit each) + correlation results (2 units)
+    # Bottom row: DLL plots (1 unit each) + empty space
+    fig = Figure(figsize=(20, 12))
+    gs = fig.add_gridspec(3, 3)
+    ax1 = fig.add_subplot(gs[0, 0])
+    ax2 = fig.add_subplot(gs[0, 1:])
+    ax3 = fig.add_subplot(gs[1, 0])
+    ax4 = fig.add_subplot(gs[1, 1:])
+    ax5 = fig.add_subplot(gs[2, 0])
+    ax6 = fig.add_subplot(gs[2, 1])
+    ax7 = fig.add_subplot(gs[2, 2])
+    # Separate C/No estimation figure
+    fig2 = Figure(figsize=(12, 6))
+    ax_cno = fig2.add_subplot()
+
     # Generate plots for each channel
     for channelNr in valid_channels:
-        # Create figure with custom subplot layout
-        fig = plt.figure(figsize=(20, 12))
-        fig.suptitle(f'Tracking Results for Channel {channelNr} (PRN {trackResults[channelNr]["PRN"]})', fontsize=16)
-        
-        timeAxisInSeconds = np.arange(1, settings.msToProcess+1) / 1000.0
-        
-        # Create custom grid layout - 3x3 with some plots spanning 2 columns
-        # Top row: scatter plot (1 unit) + nav message (2 units) 
-        # Middle row: PLL plots (1 unit each) + correlation results (2 units)
-        # Bottom row: DLL plots (1 unit each) + empty space
-        
+        # Cast the correlator outputs once per channel (no-op for float32 ndarrays)
+        tr = trackResults[channelNr]
+        I_E = np.asarray(tr['I_E'], dtype=np.float32)
+        I_P = np.asarray(tr['I_P'], dtype=np.float32)
+        I_L = np.asarray(tr['I_L'], dtype=np.float32)
+        Q_E = np.asarray(tr['Q_E'], dtype=np.float32)
+        Q_P = np.asarray(tr['Q_P'], dtype=np.float32)
+        Q_L = np.asarray(tr['Q_L'], dtype=np.float32)
+
+        # Clear the previous channel's plots
+        for ax in (ax1, ax2, ax3, ax4, ax5, ax6, ax7, ax_cno):
+            ax.clear()
+        fig.suptitle(f'Tracking Results for Channel {channelNr} (PRN {tr["PRN"]})', fontsize=16)
+
         # Plot 1: Discrete-Time Scatter Plot (top left)
-        ax1 = plt.subplot2grid((3, 3), (0, 0), colspan=1, rowspan=1)
-        ax1.plot(trackResults[channelNr]['I_P'], trackResults[channelNr]['Q_P'], '.', markersize=2)
+        ax1.plot(I_P, Q_P, '.', markersize=2)
         ax1.grid(True)
         ax1.axis('equal')
         ax1.set_title('Discrete-Time Scatter Plot')
@@ -46,80 +72,80 @@ def plotTracking(channelList, trackResults, settings):
         ax1.set_ylabel('Q prompt')
         
         # Plot 2: Navigation Message Bits (top right, spans 2 columns)
-        ax2 = plt.subplot2grid((3, 3), (0, 1), colspan=2, rowspan=1)
-        ax2.plot(timeAxisInSeconds, trackResults[channelNr]['I_P'], linewidth=1)
+        ax2.plot(timeAxisInSeconds, I_P, linewidth=1)
         ax2.grid(True)
         ax2.set_title('Bits of the navigation message')
         ax2.set_xlabel('Time (s)')
         ax2.set_ylabel('I prompt')
         
         # Plot 3: Raw PLL Discriminator (middle left)
-        ax3 = plt.subplot2grid((3, 3), (1, 0), colspan=1, rowspan=1)
-        ax3.plot(timeAxisInSeconds, trackResults[channelNr]['pllDiscr'], 'r', linewidth=1)
+        ax3.plot(timeAxisInSeconds, tr['pllDiscr'], 'r', linewidth=1)
         ax3.grid(True)
         ax3.set_xlabel('Time (s)')
         ax3.set_ylabel('Amplitude')
         ax3.set_title('Raw PLL discriminator')
         
         # Plot 4: Correlation Results (middle right, spans 2 columns)
-        ax4 = plt.subplot2grid((3, 3), (1, 1), colspan=2, rowspan=1)
-        ax4.plot(timeAxisInSeconds, np.sqrt(np.array(trackResults[channelNr]['I_E'])**2 + np.array(trackResults[channelNr]['Q_E'])**2), '-', linewidth=1, label='√(I²E + Q²E)')
-        ax4.plot(timeAxisInSeconds, np.sqrt(np.array(trackResults[channelNr]['I_P'])**2 + np.array(trackResults[channelNr]['Q_P'])**2), '-', linewidth=1, label='√(I²P + Q²P)')
-        ax4.plot(timeAxisInSeconds, np.sqrt(np.array(trackResults[channelNr]['I_L'])**2 + np.array(trackResults[channelNr]['Q_L'])**2), '-', linewidth=1, label='√(I²L + Q²L)')
+        # The three magnitudes share the time axis, so draw them as one
+        # LineCollection of shape (3, N, 2) instead of three Line2D objects
+        corrSegments = np.empty((3, len(timeAxisInSeconds), 2), dtype=np.float32)
+        corrSegments[:, :, 0] = timeAxisInSeconds
+        corrSegments[0, :, 1] = np.hypot(I_E, Q_E)
+        corrSegments[1, :, 1] = np.hypot(I_P, Q_P)
+        corrSegments[2, :, 1] = np.hypot(I_L, Q_L)
+        corrColors = ['C0', 'C1', 'C2']
+        corrLabels = ['√(I²E + Q²E)', '√(I²P + Q²P)', '√(I²L + Q²L)']
+        ax4.add_collection(LineCollection(corrSegments, colors=corrColors, linewidths=1))
+        # Collections don't autoscale on their own
+        ax4.autoscale_view()
         ax4.grid(True)
         ax4.set_title('Correlation results')
         ax4.set_xlabel('Time (s)')
         ax4.set_ylabel('Magnitude')
-        ax4.legend(fontsize=8)
+        ax4.legend(handles=[Line2D([], [], color=c, linewidth=1, label=l) for c, l in zip(corrColors, corrLabels)], fontsize=8)
         
         # Plot 5: Filtered PLL Discriminator (bottom left)
-        ax5 = plt.subplot2grid((3, 3), (2, 0), colspan=1, rowspan=1)
-        ax5.plot(timeAxisInSeconds, trackResults[channelNr]['pllDiscrFilt'], 'b', linewidth=1)
+        ax5.plot(timeAxisInSeconds, tr['pllDiscrFilt'], 'b', linewidth=1)
         ax5.grid(True)
         ax5.set_xlabel('Time (s)')
         ax5.set_ylabel('Amplitude')
         ax5.set_title('Filtered PLL discriminator')
         
         # Plot 6: Raw DLL Discriminator (bottom middle)
-        ax6 = plt.subplot2grid((3, 3), (2, 1), colspan=1, rowspan=1)
-        ax6.plot(timeAxisInSeconds, trackResults[channelNr]['dllDiscr'], 'r', linewidth=1)
+        ax6.plot(timeAxisInSeconds, tr['dllDiscr'], 'r', linewidth=1)
         ax6.grid(True)
         ax6.set_xlabel('Time (s)')
         ax6.set_ylabel('Amplitude')
         ax6.set_title('Raw DLL discriminator')
         
         # Plot 7: Filtered DLL Discriminator (bottom right)
-        ax7 = plt.subplot2grid((3, 3), (2, 2), colspan=1, rowspan=1)
-        ax7.plot(timeAxisInSeconds, trackResults[channelNr]['dllDiscrFilt'], 'b', linewidth=1)
+        ax7.plot(timeAxisInSeconds, tr['dllDiscrFilt'], 'b', linewidth=1)
         ax7.grid(True)
         ax7.set_xlabel('Time (s)')
         ax7.set_ylabel('Amplitude')
         ax7.set_title('Filtered DLL discriminator')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         # Save the main tracking plot
-        filename1 = f'tracking_main_channel_{channelNr}_PRN_{trackResults[channelNr]["PRN"]}.jpg'
+        filename1 = f'tracking_main_channel_{channelNr}_PRN_{tr["PRN"]}.jpg'
         filepath1 = os.path.join(plots_dir, filename1)
-        plt.savefig(filepath1, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.savefig(filepath1, dpi=300, bbox_inches='tight')
         
-        # Separate C/No estimation figure
-        fig2, ax_cno = plt.subplots(figsize=(12, 6))
-        ax_cno.plot(trackResults[channelNr]['CNo']['VSMValue'], linewidth=1)
-        ax_cno.plot(trackResults[channelNr]['CNo']['VSMValue'], 'o', markersize=3)
-        ax_cno.set_title(f'CNo Estimation (computed only every 400msec\n(or as specified in initSettings.m)) - Channel {channelNr} PRN {trackResults[channelNr]["PRN"]}')
+        # C/No estimation plot
+        ax_cno.plot(tr['CNo']['VSMValue'], linewidth=1)
+        ax_cno.plot(tr['CNo']['VSMValue'], 'o', markersize=3)
+        ax_cno.set_title(f'CNo Estimation (computed only every 400msec\n(or as specified in initSettings.m)) - Channel {channelNr} PRN {tr["PRN"]}')
         ax_cno.set_ylabel('dB-Hz')
         ax_cno.set_xlabel('400msec (or as set in initSettings.m) epoch computation')
         ax_cno.grid(True)
         
-        plt.tight_layout()
+        fig2.tight_layout()
         
         # Save the C/No plot
-        filename2 = f'tracking_cno_channel_{channelNr}_PRN_{trackResults[channelNr]["PRN"]}.jpg'
+        filename2 = f'tracking_cno_channel_{channelNr}_PRN_{tr["PRN"]}.jpg'
         filepath2 = os.path.join(plots_dir, filename2)
-        plt.savefig(filepath2, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig2.savefig(filepath2, dpi=300, bbox_inches='tight')
         
         print(f'   Saved tracking plots: {filename1} and {filename2}')
     
@@ -1,12 +1,35 @@
 import numpy as np
 from Common.leastSquarePos import least_square_pos
-from Include.satpos import satpos
+from Include.satpos import satpos, eph_arrays
 from Common.findUtmZone import find_utm_zone
 from Common.calculatePseudoranges import calculate_pseudoranges
 from Common.cart2 import cart2geo, cart2utm
 from Include.NAVdecoding import NAVdecoding
 from copy import deepcopy
 from Include.eph_structure_init import eph_structure_init
+from init_settings import C
+
+def nav_solution_dtype(numberOfChannels):
+    """
+    Returns the structured dtype of one row (one measurement epoch) of
+    navSolutions. Per-satellite fields are sized to the number of channels;
+    unused entries hold PRN 0 and NaN.
+    """
+    return np.dtype([
+        ('PRN', 'i4', (numberOfChannels,)),
+        ('el', 'f8', (numberOfChannels,)),
+        ('az', 'f8', (numberOfChannels,)),
+        ('transmitTime', 'f8', (numberOfChannels,)),
+        ('satClkCorr', 'f8', (numberOfChannels,)),
+        ('rawP', 'f8', (numberOfChannels,)),
+        ('correctedP', 'f8', (numberOfChannels,)),
+        ('X', 'f8'), ('Y', 'f8'), ('Z', 'f8'), ('dt', 'f8'),
+        ('DOP', 'f8', (5,)),
+        ('latitude', 'f8'), ('longitude', 'f8'), ('height', 'f8'),
+        ('utmZone', 'U3'), ('E', 'f8'), ('N', 'f8'), ('U', 'f8'),
+        ('localTime', 'f8'),
+        ('currMeasSample', 'f8'),
+    ])
 
 def postNavigation(trackResults, settings):
     """
@@ -23,6 +46,8 @@ def postNavigation(trackResults, settings):
         navSolutions    - contains measured pseudoranges, receiver
                         clock error, receiver coordinates in several
                         coordinate systems (at least ECEF and UTM).
+                        Structured ndarray with one row per measurement
+                        (see nav_solution_dtype).
         eph             - received ephemerides of all SV (structure array).
 
     --------------------------------------------------------------------------
@@ -70,13 +95,15 @@ def postNavigation(trackResults, settings):
     # Pre-allocate space =======================================================
     # Starting positions of the first message in the input bit stream 
     # trackResults.I_P in each channel. The position is PRN code count
-    # since start of tracking. Corresponding value will be set to inf 
-    # if no valid preambles were detected in the channel.
-    subFrameStart = np.full(settings.numberOfChannels, np.inf)
+    # since start of tracking.
+    subFrameStart = np.zeros(settings.numberOfChannels)
 
-    # Time Of Week (TOW) of the first message(in seconds). Corresponding value
-    # will be set to inf if no valid preambles were detected in the channel.
-    TOW = np.full(settings.numberOfChannels, np.inf)
+    # Time Of Week (TOW) of the first message(in seconds).
+    TOW = np.zeros(settings.numberOfChannels)
+
+    # Marks the channels in which valid preambles were detected (subFrameStart
+    # and TOW are only meaningful for these channels)
+    navValid = np.zeros(settings.numberOfChannels, dtype=bool)
 
     #--- Make a list of channels excluding not tracking channels ---------------
     activeChnList = [i for i, tr in enumerate(trackResults) if tr['status'] != '-']
@@ -90,11 +117,14 @@ def postNavigation(trackResults, settings):
         PRN = trackResults[ch]['PRN']
         print(f'Decoding NAV for PRN {PRN:02d} --------------------')
         # Decode ephemerides and TOW of the first sub-frame
-        decoded, subFrameStart[ch], TOW[ch] = NAVdecoding(trackResults[ch]['I_P'], settings)
+        decoded, chSubFrameStart, chTOW = NAVdecoding(trackResults[ch]['I_P'], settings)
+        if chSubFrameStart != np.inf:
+            subFrameStart[ch], TOW[ch] = chSubFrameStart, chTOW
+            navValid[ch] = True
         eph[PRN - 1].update(decoded)
 
         # Exclude satellite if it does not have the necessary nav data
-        if not (decoded.get('IODC') and decoded.get('IODE_sf2') and decoded.get('IODE_sf3') and decoded.get('health', 0) == 0):
+        if not (navValid[ch] and decoded.get('IODC') and decoded.get('IODE_sf2') and decoded.get('IODE_sf3') and decoded.get('health', 0) == 0):
             print(f'    Ephemeris decoding fails for PRN {PRN:02d} !')
             activeChnList.remove(ch)
         else:
@@ -106,6 +136,9 @@ def postNavigation(trackResults, settings):
         print('Too few satellites with ephemeris data for position calculations. Exiting!')
         return None, None
 
+    # Ephemerides as arrays indexed by PRN-1, for satpos
+    ephArrays = eph_arrays(eph)
+
     #--------------------------------------------------------------------------
     # Set measurement-time point and step  =====================================
     # Find start and end of measurement point locations in IF signal stream with available measurements
@@ -122,17 +155,18 @@ def postNavigation(trackResults, settings):
 
     #--------------------------------------------------------------------------
     # Initialization =========================================================
-    # Set the satellite elevations array to INF to include all satellites for
-    # the first calculation of receiver position. There is no reference point
-    # to find the elevation angle as there is no receiver position estimate at
-    # this point.
-    satElev = np.full(settings.numberOfChannels, np.inf)
+    # Satellite elevations per channel. No elevation is valid before the
+    # first calculation of receiver position, so all satellites are included
+    # then. There is no reference point to find the elevation angle as there
+    # is no receiver position estimate at this point.
+    satElev = np.zeros(settings.numberOfChannels)
+    satElevValid = np.zeros(settings.numberOfChannels, dtype=bool)
 
     # Save the active channel list. The list contains satellites that are
     # tracked and have the required ephemeris data. In the next step the list
     # will depend on each satellite's elevation angle, which will change over
     # time.  
-    readyChnList = activeChnList[:]
+    readyChnList = np.array(activeChnList)
 
     # Set local time to inf for first calculation of receiver position. After
     # first fix, localTime will be updated by measurement sample step.
@@ -142,11 +176,14 @@ def postNavigation(trackResults, settings):
     #   Do the satellite and receiver position calculations                  #
     #--------------------------------------------------------------------------
     print('Positions are being computed. Please wait...')
-    navSolutions = []
+    navSolutions = np.zeros(measNrSum, dtype=nav_solution_dtype(settings.numberOfChannels))
+    for name in ('el', 'az', 'transmitTime', 'satClkCorr', 'rawP', 'correctedP'):
+        navSolutions[name] = np.nan
     for i in range(measNrSum):
         print(f'Fix: Processing {i+1:02d} of {measNrSum:02d}')
         # Exclude satellites, that are below elevation mask 
-        activeNow = [ch for ch in readyChnList if satElev[ch-1] >= settings.elevationMask]
+        aboveMask = (satElev[readyChnList] >= settings.elevationMask) | ~satElevValid[readyChnList]
+        activeNow = readyChnList[aboveMask].tolist()
 
         currSample = sampleStart + step * i
         # Find pseudoranges
@@ -157,35 +194,36 @@ def postNavigation(trackResults, settings):
         transmitTime = np.array(transmitTime)
 
         # Find satellites positions and clocks corrections
-        satPos, satCorr = satpos(transmitTime[activeNow], [trackResults[ch]['PRN'] for ch in activeNow], eph)
+        satPos, satCorr = satpos(transmitTime[activeNow], [trackResults[ch]['PRN'] for ch in activeNow], ephArrays)
 
         # Find receiver position
         if len(activeNow) > 3:
             # Correct pseudorange for SV clock error
-            clkCorr = rawP[activeNow] + satCorr * settings.c
+            clkCorr = rawP[activeNow] + satCorr * C
             xyzdt, el, az, dop = least_square_pos(satPos, clkCorr, settings)
             lat, lon, h = cart2geo(*xyzdt[:3], 4)
             utmZone = find_utm_zone(lat, lon)
             e, n, u = cart2utm(*xyzdt[:3], utmZone)
 
-            navSolutions.append({
-                'PRN': [trackResults[ch]['PRN'] for ch in activeNow],
-                'el': el,
-                'az': az,
-                'transmitTime': transmitTime[activeNow],
-                'satClkCorr': satCorr,
-                'rawP': rawP[activeNow],
-                'correctedP': rawP[activeNow] + satCorr * settings.c - xyzdt[3],
-                'X': xyzdt[0], 'Y': xyzdt[1], 'Z': xyzdt[2], 'dt': xyzdt[3],
-                'DOP': dop,
-                'latitude': lat, 'longitude': lon, 'height': h,
-                'utmZone': utmZone, 'E': e, 'N': n, 'U': u,
-                'localTime': localTime - xyzdt[3] / settings.c,
-                'currMeasSample': currSample
-            })
+            nSat = len(activeNow)
+            sol = navSolutions[i]
+            sol['PRN'][:nSat] = [trackResults[ch]['PRN'] for ch in activeNow]
+            sol['el'][:nSat] = el
+            sol['az'][:nSat] = az
+            sol['transmitTime'][:nSat] = transmitTime[activeNow]
+            sol['satClkCorr'][:nSat] = satCorr
+            sol['rawP'][:nSat] = rawP[activeNow]
+            sol['correctedP'][:nSat] = rawP[activeNow] + satCorr * C - xyzdt[3]
+            sol['X'], sol['Y'], sol['Z'], sol['dt'] = xyzdt[:4]
+            sol['DOP'] = dop
+            sol['latitude'], sol['longitude'], sol['height'] = lat, lon, h
+            sol['utmZone'], sol['E'], sol['N'], sol['U'] = utmZone, e, n, u
+            sol['localTime'] = localTime - xyzdt[3] / C
+            sol['currMeasSample'] = currSample
 
             # Update the satellites elevations vector
-            satElev = el
+            satElev[activeNow] = el
+            satElevValid[activeNow] = True
             # Update local time by measurement step
             localTime += step / settings.samplingFreq
         else:
@@ -196,6 +234,6 @@ def postNavigation(trackResults, settings):
             # elevation mask at some point. This would be a good place to
             # update positions of the excluded satellites.
             print('   Exit Program')
-            return navSolutions, eph
+            return navSolutions[:i], eph
 
     return navSolutions, eph
@@ -56,21 +56,20 @@ receiver.
 """
 import numpy as np
 from datetime import datetime
+from Include._io_utils import open_if_data, map_if_file, iq_to_complex, sample_dtype, skip_samples, bytes_per_sample
 from Include.acquisition import acquisition
 from Include.preRun import pre_run
 from Include.tracking import tracking
 from Include.postNavigation import postNavigation
 from Include.showChannelStatus import show_channel_status
-from Include.plotAcquisition import plotAcquisition
-from Include.plotTracking import plotTracking
-from Include.plotNavigation import plotNavigation
 
 def postProcessing(settings):
     # %% Initialization =========================================================
     print('Starting processing...')
 
     try:
-        fid = open(settings.fileName, 'rb')
+        # The whole record is memory-mapped once for tracking
+        signal_map = map_if_file(settings)
     except Exception as e:
         # Error while opening the data file.
         raise RuntimeError(f"Unable to read file {settings.fileName}: {e}")
@@ -78,62 +77,55 @@ def postProcessing(settings):
     # Initialize the multiplier to adjust for the data type
     data_adapt_coeff = 1 if settings.fileType == 1 else 2
 
-    # Move the starting point of processing. Can be used to start the
-    # signal processing at any point in the data record (e.g. good for long
-    # records or for signal processing in blocks).
-    fid.seek(data_adapt_coeff * settings.skipNumberOfBytes, 0)
-
     # %% Acquisition ============================================================
     acqResults = None
     if settings.skipAcquisition == 0:
         # Find number of samples per spreading code
-        samples_per_code = int(round(settings.samplingFreq / (settings.codeFreqBasis / settings.codeLength)))
+        samples_per_code = settings.samples_per_code
         # At least 42ms of signal are needed for fine frequency estimation
         code_len = max(42, settings.acqNonCohTime + 2)
         num_samples = data_adapt_coeff * code_len * samples_per_code
 
         # Read data for acquisition.
-        if settings.dataType == 'schar':
-            dtype = np.int8
-        elif settings.dataType == 'short':
-            dtype = np.int16
-        elif settings.dataType == 'float':
-            dtype = np.float32
-        else:
-            raise ValueError(f"Unsupported dataType: {settings.dataType}")
-        data = np.fromfile(fid, dtype=dtype, count=num_samples)
-        if data.size < num_samples:
-            raise ValueError('Could not read enough data from the data file.')
+        dtype = sample_dtype(settings)
+        # Move the starting point of processing. Can be used to start the
+        # signal processing at any point in the data record (e.g. good for long
+        # records or for signal processing in blocks).
+        data = open_if_data(settings, skip_samples(settings) * bytes_per_sample(settings),
+                            num_samples, dtype)
 
         if data_adapt_coeff == 2:
-            # For complex data, separate I and Q
-            data_i = data[::2]
-            data_q = data[1::2]
-            data = data_i + 1j * data_q
+            # For complex data, combine I and Q
+            data = iq_to_complex(data)
 
         # --- Do the acquisition -------------------------------------------
         print('   Acquiring satellites...')
-        acqResults = acquisition(data, settings)
+        if settings.useGPU:
+            from Include.acquisitionGPU import acquisition_gpu
+            acqResults = acquisition_gpu(data, settings)
+        else:
+            acqResults = acquisition(data, settings)
 
-        # Save acquisition results
-        np.save("acqResults.npy", acqResults)
-        print('   Acquisition results saved to acqResults.npy')
+        # Save acquisition results (one array per field, no pickling)
+        np.savez("acqResults.npz", **acqResults)
+        print('   Acquisition results saved to acqResults.npz')
         if settings.plotAcquisition:
+            # Plotting modules (and matplotlib) are only loaded when used
+            from Include.plotAcquisition import plotAcquisition
             plotAcquisition(acqResults)
             print('Acquisition plot saved')
         
     else:
-        # Load the npy file
+        # Load the npz file
         try:
-            acqResults = np.load("acqResults.npy", allow_pickle=True).item()
-            print('   Loaded acquisition results from acqResults.npy')
+            with np.load("acqResults.npz") as z:
+                acqResults = {k: z[k] for k in z.files}
+            print('   Loaded acquisition results from acqResults.npz')
         except FileNotFoundError:
-            print('   acqResults.npy not found. Please run acquisition first.')
-            fid.close()
+            print('   acqResults.npz not found. Please run acquisition first.')
             return
         except Exception as e:
-            print(f'   Error loading acqResults.npy: {e}')
-            fid.close()
+            print(f'   Error loading acqResults.npz: {e}')
             return
 
 
@@ -146,15 +138,13 @@ def postProcessing(settings):
     else:
         # No satellites to track, exit
         print('No GNSS signals detected, signal processing finished.')
-        fid.close()
         return
 
     # %% Track the signal =======================================================
     start_time = datetime.now()
     print(f'   Tracking started at {start_time.strftime("%Y-%m-%d %H:%M:%S")}')
     # Process all channels for given data block
-    trkResults, _ = tracking(fid, channel, settings)
-    fid.close()
+    trkResults, _ = tracking(signal_map, channel, settings)
     
     elapsed = datetime.now() - start_time
     print(f'   Tracking is over (elapsed time {elapsed})')
@@ -174,8 +164,10 @@ def postProcessing(settings):
     # %% Plot all results ===================================================
     print('   Plotting results...')
     if settings.plotTracking:
+        from Include.plotTracking import plotTracking
         #plotTracking(range(1, settings.numberOfChannels + 1), trkResults, settings)
         plotTracking(range(settings.numberOfChannels), trkResults, settings)
     if settings.plotNavigation:
+        from Include.plotNavigation import plotNavigation
         plotNavigation(navResults, settings)
     print('Post processing of the signal is over.')
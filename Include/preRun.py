@@ -1,5 +1,13 @@
 import numpy as np
 
+# Record layout of one tracking channel
+CHANNEL_DTYPE = np.dtype([
+    ('PRN', np.int32),
+    ('acquiredFreq', np.float64),
+    ('codePhase', np.int32),
+    ('status', 'U1'),
+])
+
 def pre_run(acq_results, settings):
     """
     Initializes tracking channels from acquisition data. The acquired
@@ -15,7 +23,9 @@ def pre_run(acq_results, settings):
                             is an array.
         settings: receiver settings
     Returns:
-        List[dict]: List of channel dictionaries with initial tracking setup
+        np.ndarray: numberOfChannels records of CHANNEL_DTYPE with the
+                    initial tracking setup. Unused channels have PRN 0 and
+                    status '-'.
     --------------------------------------------------------------------------
     #                           SoftGNSS v3.0
     # 
@@ -39,52 +49,47 @@ def pre_run(acq_results, settings):
     #USA.
     #--------------------------------------------------------------------------
     """
-    # Initialize default channel template
-    channel_template = {
-        "PRN": 0,
-        "acquiredFreq": 0,
-        "codePhase": 0,
-        "status": '-',
-    }
-
-    # Sort peaks to find strongest signals, keep the peak index information
-    sorted_idx = np.argsort(acq_results["peakMetric"])[::-1]
+    # Ensure PRNs and peaks are NumPy arrays before advanced indexing
+    prns = np.asarray(acq_results["PRN"]).astype(np.int64)
+    peak_metric = np.asarray(acq_results["peakMetric"])
 
-    # Now sort through the acquired signals to ensure they are actual 
+    # Sort through the acquired signals to ensure they are actual 
     # orbiting LEO satellites, not WAAS satellites.
+    # Keep only PRNs 1..32 (lookup table indexed by PRN)
+    allowed_lut = np.zeros(max(int(prns.max(initial=0)), 32) + 1, dtype=bool)
+    allowed_lut[1:33] = True
+    candidates = np.flatnonzero(allowed_lut[prns])
 
-    # Ensure PRNs are a NumPy array before advanced indexing
-    prns = np.asarray(acq_results["PRN"])
-    sorted_prn_channels = prns[sorted_idx]  
+    # Select the strongest signals: partition out the top numberOfChannels
+    # peaks, then sort only those, keeping the peak index information
+    num_keep = min(settings.numberOfChannels, len(candidates))
+    if num_keep < len(candidates):
+        top = candidates[np.argpartition(-peak_metric[candidates], num_keep - 1)[:num_keep]]
+    else:
+        top = candidates
+    keep_idx = top[np.argsort(-peak_metric[top], kind='stable')]
 
-    # Keep only PRNs 1..32 
-    allowed_prns = np.arange(1, 33)
-    mask = np.isin(sorted_prn_channels, allowed_prns)
-    filtered_prns = sorted_prn_channels[mask]      # <- apply the mask to get values
-    keep_idx = sorted_idx[mask]
+    # Now fill the channel records, with each record describing the signal
+    # to be tracked. The selected rows are copied column by column.
+    # Channels left over keep PRN 0 and status '-'.
+    rows = keep_idx
+    channels = np.zeros(settings.numberOfChannels, dtype=CHANNEL_DTYPE)
+    channels['status'] = '-'
+    channels['PRN'][:num_keep] = prns[rows]
+    channels['acquiredFreq'][:num_keep] = np.asarray(acq_results["carrFreq"])[rows]
+    channels['codePhase'][:num_keep] = np.asarray(acq_results["codePhase"])[rows]
+    channels['status'][:num_keep] = 'T'
 
-    # Now build a new list of the channel tracking information, with 
-    # each element in the list describing the signal to be tracked.
- 
-    rows = keep_idx[0:settings.numberOfChannels]
-    channels = []
+    # Report the selected signals in a single write
+    if num_keep:
+        print('\n'.join(
+            f"PRN{prn} will be tracked - peakMetric = {peak:.2f}"
+            for prn, peak in zip(channels['PRN'][:num_keep].tolist(), peak_metric[rows].tolist())
+        ))
 
-    for row in rows:
-        channels.append({
-            "PRN": int(acq_results["PRN"][row]),
-            "acquiredFreq": float(acq_results["carrFreq"][row]),
-            "codePhase": int(acq_results["codePhase"][row]),
-            "status": "T",
-        })
-        print (f"PRN{int(acq_results["PRN"][row])} will be tracked - "
-               f"peakMetric = {acq_results["peakMetric"][row]:.2f}"
-        )
-
-    # pad with defaults if fewer rows than channels
-    # This really shouldn't be necessary; subsequent processes should be able to take
-    # a list of arbitrary length.
-    #
-    while len(channels) < settings.numberOfChannels:
-        channels.append(channel_template.copy())
+    # Compile the Numba kernels now rather than in the first tracking loop
+    if settings.warmupJIT:
+        from Include._kernels import _warmup
+        _warmup()
 
     return channels
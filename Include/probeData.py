@@ -1,12 +1,42 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.signal import welch
+from functools import lru_cache
+from scipy.signal import ShortTimeFFT
+from scipy.signal.windows import hann
 
 from init_settings import Settings  # Assumes Settings is defined in init_settings.py
+from Include._io_utils import open_if_data, iq_to_complex, sample_dtype, skip_samples, bytes_per_sample
+
+# Welch PSD parameters of the frequency domain plot
+PSD_NPERSEG = 32768
+PSD_NOVERLAP = 2048
+
+@lru_cache(maxsize=None)
+def _psd_sft(fs, fft_mode):
+    """
+    Returns the ShortTimeFFT used for the Welch PSD estimate. The instance
+    (Hann window, hop and scaling) is built once per sampling frequency and
+    FFT mode and reused between calls.
+    """
+    return ShortTimeFFT(hann(PSD_NPERSEG, sym=False), hop=PSD_NPERSEG - PSD_NOVERLAP,
+                        fs=fs, mfft=PSD_NPERSEG, fft_mode=fft_mode, scale_to='psd')
+
+def _welch_psd(x, fs, fft_mode):
+    """
+    Welch PSD estimate equivalent to scipy.signal.welch (Hann window,
+    constant detrend, density scaling), using the cached ShortTimeFFT.
+    fft_mode is 'onesided2X' for real data and 'centered' for I/Q data
+    (zero frequency in the middle).
+    """
+    sft = _psd_sft(fs, fft_mode)
+    # Only full segments starting at the first sample, as welch does
+    n_seg = (len(x) - sft.m_num) // sft.hop + 1
+    Sx = sft.stft_detrend(x, 'constant', p0=0, p1=n_seg, k_offset=sft.m_num_mid)
+    return sft.f, np.mean(np.abs(Sx) ** 2, axis=-1)
 
 def probeData(settings: Settings):
     """
     Plots raw data information: time domain plot, frequency domain plot, and histogram.
+    If settings.probePlot is off, only checks that the data can be read.
 
     The function can be called as:
         probeData(settings)
@@ -44,35 +74,31 @@ def probeData(settings: Settings):
 
     fileNameStr = settings.fileName
 
-    # --- Open file and read data ---
+    # --- Map file and read data ---
     try:
-        with open(fileNameStr, 'rb') as f:
-            # Move the starting point of processing. Can be used to start the
-            # signal processing at any point in the data record (e.g. for long records).
-            f.seek(settings.skipNumberOfBytes, 0)
-            # Find number of samples per spreading code
-            samplesPerCode = int(round(settings.samplingFreq / (settings.codeFreqBasis / settings.codeLength)))
-            # Real data: dataAdaptCoeff=1, I/Q data: dataAdaptCoeff=2
-            dataAdaptCoeff = 1 if settings.fileType == 1 else 2
-            # Read 100ms of signal
-            num_samples = dataAdaptCoeff * 100 * samplesPerCode
-            # Select data type
-            if settings.dataType == 'schar':
-                dtype = np.int8
-            elif settings.dataType == 'short':
-                dtype = np.int16
-            elif settings.dataType == 'float':
-                dtype = np.float32
-            else:
-                raise ValueError(f"Unsupported dataType: {settings.dataType}")
-            data = np.fromfile(f, dtype=dtype, count=num_samples)
-            if data.size < num_samples:
-                # The file is too short
-                raise ValueError('Could not read enough data from the data file.')
+        # Find number of samples per spreading code
+        samplesPerCode = settings.samples_per_code
+        # Real data: dataAdaptCoeff=1, I/Q data: dataAdaptCoeff=2
+        dataAdaptCoeff = 1 if settings.fileType == 1 else 2
+        # Read 100ms of signal
+        num_samples = dataAdaptCoeff * 100 * samplesPerCode
+        # Select data type
+        dtype = sample_dtype(settings)
+        # Move the starting point of processing. Can be used to start the
+        # signal processing at any point in the data record (e.g. for long records).
+        # Raises if the file is too short.
+        data = open_if_data(settings, skip_samples(settings) * bytes_per_sample(settings),
+                            num_samples, dtype)
     except Exception as e:
         # Error while opening the data file
         raise RuntimeError(f"Unable to read file {fileNameStr}: {e}")
 
+    # The data file is readable; with plotting disabled there is nothing
+    # more to do (and matplotlib is never loaded)
+    if not settings.probePlot:
+        return
+    import matplotlib.pyplot as plt
+
     # --- Initialization ---------------------------------------------------
     plt.figure(100, figsize=(12, 8))
     plt.clf()
@@ -92,7 +118,7 @@ def probeData(settings: Settings):
         plt.tight_layout()
     else:
         # I/Q data
-        data_cplx = data[::2] + 1j * data[1::2]
+        data_cplx = iq_to_complex(data)
         plt.subplot(3, 2, 4)
         plt.plot(1000 * timeScale[:half_samples], np.real(data_cplx[:half_samples]))
         plt.title('Time domain plot (I)')
@@ -111,7 +137,7 @@ def probeData(settings: Settings):
     if settings.fileType == 1:
         # Real Data
         plt.subplot(2, 2, (1, 2))
-        f, Pxx = welch(data, fs=settings.samplingFreq, nperseg=32768, noverlap=2048, nfft=32768)
+        f, Pxx = _welch_psd(data, settings.samplingFreq, 'onesided2X')
         plt.semilogy(f/1e6, Pxx)
         plt.title('Frequency domain plot')
         plt.xlabel('Frequency (MHz)')
@@ -120,10 +146,8 @@ def probeData(settings: Settings):
     else:
         # I/Q Data
         plt.subplot(3, 2, (1, 2))
-        f, Pxx = welch(data_cplx, fs=settings.samplingFreq, nperseg=32768, noverlap=2048, nfft=32768, return_onesided=False)
-        # Shift zero freq to center
-        f = np.fft.fftshift(f)
-        Pxx = np.fft.fftshift(Pxx)
+        # Zero frequency is already in the center
+        f, Pxx = _welch_psd(data_cplx, settings.samplingFreq, 'centered')
         plt.plot(f/1e6, 10*np.log10(Pxx))
         plt.title('Frequency domain plot')
         plt.xlabel('Frequency (MHz)')
@@ -134,24 +158,28 @@ def probeData(settings: Settings):
     if settings.fileType == 1:
         plt.subplot(2, 2, 4)
         plt.hist(data, bins=np.arange(-128, 129))
-        dmax = np.max(np.abs(data)) + 1
+        # Largest sample magnitude from min/max (no temporary; np.abs
+        # would also overflow on -128 for int8 samples)
+        dmax = max(-float(data.min()), float(data.max())) + 1
         plt.axis([-dmax, dmax, None, None])
         plt.title('Histogram')
         plt.xlabel('Bin')
         plt.ylabel('Number in bin')
         plt.grid(True)
     else:
-        plt.subplot(3, 2, 6)
-        plt.hist(np.real(data_cplx), bins=np.arange(-128, 129))
+        # Common axis limit of both histograms: the largest magnitude of the
+        # complex samples (computed once for both)
+        re, im = data_cplx.real, data_cplx.imag
         dmax = np.max(np.abs(data_cplx)) + 1
+        plt.subplot(3, 2, 6)
+        plt.hist(re, bins=np.arange(-128, 129))
         plt.axis([-dmax, dmax, None, None])
         plt.title('Histogram (I)')
         plt.xlabel('Bin')
         plt.ylabel('Number in bin')
         plt.grid(True)
         plt.subplot(3, 2, 5)
-        plt.hist(np.imag(data_cplx), bins=np.arange(-128, 129))
-        dmax = np.max(np.abs(data_cplx)) + 1
+        plt.hist(im, bins=np.arange(-128, 129))
         plt.axis([-dmax, dmax, None, None])
         plt.title('Histogram (Q)')
         plt.xlabel('Bin')
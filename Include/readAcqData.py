@@ -4,6 +4,7 @@
 import numpy as np
 from typing import Tuple
 import math
+from Include._io_utils import open_if_data, iq_to_complex, sample_dtype, skip_samples, bytes_per_sample
 def readAcqData(settings, code_periods = None, skip = None, framing = False) -> np.ndarray:
     """
     read a datafile
@@ -19,12 +20,6 @@ def readAcqData(settings, code_periods = None, skip = None, framing = False) ->
     skip is the number of samples in the datafile to skip
     """
     
-    try:
-        fid = open(settings.fileName, 'rb')
-    except Exception as e:
-        # Error while opening the data file.
-        raise RuntimeError(f"Unable to read file {settings.fileName}: {e}")
-    
     # Initialize the multiplier to adjust for the data type
     data_adapt_coeff = 1 if settings.fileType == 1 else 2
     
@@ -32,12 +27,12 @@ def readAcqData(settings, code_periods = None, skip = None, framing = False) ->
     # signal processing at any point in the data record (e.g. good for long
     # records or for signal processing in blocks).
     if skip == None:
-        fid.seek(data_adapt_coeff * settings.skipNumberOfBytes, 0)
+        offset_bytes = skip_samples(settings) * bytes_per_sample(settings)
     else:
-        fid.seek(data_adapt_coeff * skip, 0)
+        offset_bytes = data_adapt_coeff * skip
     
     # %% Acquisition ============================================================
-    samples_per_code = int(round(settings.codeLength * settings.samplingFreq / settings.codeFreqBasis))
+    samples_per_code = settings.samples_per_code
     # At least 42ms of signal are needed for fine frequency estimation
 
     code_len = (2*settings.acqCoherentInt)*(settings.acqNonCohTime)
@@ -49,24 +44,16 @@ def readAcqData(settings, code_periods = None, skip = None, framing = False) ->
         num_samples = code_periods * code_len * samples_per_code
         
     # Read data for acquisition.
-    if settings.dataType == 'schar':
-        dtype = np.int8
-    elif settings.dataType == 'short':
-        dtype = np.int16
-    elif settings.dataType == 'float':
-        dtype = np.float32
-    else:
-        raise ValueError(f"Unsupported dataType: {settings.dataType}")
-    data = np.fromfile(fid, dtype=dtype, count=num_samples)
-    if data.size < num_samples:
-        raise ValueError('Could not read enough data from the data file.')
+    dtype = sample_dtype(settings)
+    try:
+        data = open_if_data(settings, offset_bytes, num_samples, dtype)
+    except OSError as e:
+        # Error while opening the data file.
+        raise RuntimeError(f"Unable to read file {settings.fileName}: {e}")
     
     if data_adapt_coeff == 2:
-        # For complex data, separate I and Q
-        data_i = data[::2]
-        data_q = data[1::2]
-        data = data_i + 1j * data_q
-    fid.close()
+        # For complex data, combine I and Q
+        data = iq_to_complex(data)
     # If the framing flag is set to be true, we fill 1mS of data down each column
     # and there is one column for each code period
     #
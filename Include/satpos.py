@@ -1,21 +1,59 @@
 import numpy as np
-
-def satpos(transmitTime, prnList, eph):
+from dataclasses import dataclass
+from Common.jit import njit
+
+# Ephemeris parameters used by satpos, in the column order of EphArrays.table
+EPH_FIELDS = (
+    't_oc',
+    'a_f2',
+    'a_f1',
+    'a_f0',
+    'T_GD',
+    'sqrtA',
+    't_oe',
+    'deltan',
+    'M_0',
+    'e',
+    'omega',
+    'C_uc',
+    'C_us',
+    'C_rc',
+    'C_rs',
+    'i_0',
+    'iDot',
+    'C_ic',
+    'C_is',
+    'omega_0',
+    'omegaDot',
+)
+(EPH_T_OC, EPH_A_F2, EPH_A_F1, EPH_A_F0, EPH_T_GD, EPH_SQRT_A, EPH_T_OE,
+ EPH_DELTAN, EPH_M_0, EPH_E, EPH_OMEGA, EPH_C_UC, EPH_C_US, EPH_C_RC, EPH_C_RS,
+ EPH_I_0, EPH_I_DOT, EPH_C_IC, EPH_C_IS, EPH_OMEGA_0, EPH_OMEGA_DOT) = range(len(EPH_FIELDS))
+
+def satpos(transmitTime, prnList, eph, want_velocity=False):
     """
     SATPOS Calculation of X,Y,Z satellites coordinates at TRANSMITTIME for
     given ephemeris EPH. Coordinates are calculated for each satellite in the
     list PRNLIST.
 
     [satPositions, satClkCorr] = satpos(transmitTime, prnList, eph)
+    [satPositions, satClkCorr, satVelocity, satClkCorrRat] = ...
+        satpos(transmitTime, prnList, eph, want_velocity=True)
 
     Inputs:
         transmitTime  - transmission time: 1 by settings.numberOfChannels
         prnList       - list of PRN-s to be processed
-        eph           - ephemeridies of satellites
+        eph           - ephemeridies of satellites (list of dicts, or the
+                        EphArrays built from it once by eph_arrays)
+        want_velocity - also compute the velocities and clock drifts (in the
+                        same pass, sharing the terms of the positions)
 
     Outputs:
         satPositions  - positions of satellites (in ECEF system [X; Y; Z])
         satClkCorr    - correction of satellites clocks in s
+        satVelocity   - velocities of satellites (in ECEF system, m/s;
+                        want_velocity only)
+        satClkCorrRat - drift of satellites clocks in s/s (want_velocity only)
 
     --------------------------------------------------------------------------
                                 SoftGNSS v3.0
@@ -25,139 +63,217 @@ def satpos(transmitTime, prnList, eph):
     Updated by Darius Plausinaitis, Peter Rinder and Nicolaj Bertelsen
     """
 
-    # %% Initialize constants ===================================================
-    gpsPi = 3.1415926535898  # Pi used in the GPS coordinate system
-    Omegae_dot = 7.2921151467e-5  # Earth rotation rate, [rad/s]
-    GM = 3.986005e14  # Earth's universal gravitational constant, [m^3/s^2]
-    F = -4.442807633e-10  # Constant, [sec/(meter)^(1/2)]
-
     numOfSatellites = len(prnList)
 
     # %% Initialize results =====================================================
     satClkCorr = np.zeros(numOfSatellites)  # Correction of satellites clocks in s
     satPositions = np.zeros((3, numOfSatellites))  # Positions of satellites (ECEF [X; Y; Z])
+    satVelocity = np.zeros((3, numOfSatellites))  # Velocities of satellites (ECEF)
+    satClkCorrRat = np.zeros(numOfSatellites)  # Drift of satellites clocks in s/s
+
+    # %% Gather the ephemerides of the listed satellites ========================
+    if not isinstance(eph, EphArrays):
+        eph = eph_arrays(eph)
+    idx = np.asarray(prnList, dtype=int) - 1
+    # Skip satellites without ephemeris (their results are left at zero)
+    valid = eph.valid[idx]
+    if np.any(valid):
+        (satPositions[:, valid], satClkCorr[valid],
+         satVelocity[:, valid], satClkCorrRat[valid]) = _satpos(
+            np.asarray(transmitTime, dtype=float)[valid], eph.table[idx[valid]],
+            want_velocity)
+
+    if want_velocity:
+        return satPositions, satClkCorr, satVelocity, satClkCorrRat
+    return satPositions, satClkCorr
+
+@njit(cache=True)
+def _satpos(transmitTime, ephRows, want_velocity):
+    # Positions and clock corrections of the satellites with the ephemerides
+    # ephRows (one row of EphArrays.table per satellite), and if
+    # want_velocity their velocities and clock drifts (left at zero
+    # otherwise). All satellites are processed at once: every quantity
+    # below is a vector with one element per satellite.
 
-    # %% Process each satellite =================================================
-    for satNr in range(numOfSatellites):
-        prn = prnList[satNr]
-
-        # Defensive: skip missing or empty PRNs
-        if prn >= len(eph) or not eph[prn] or 't_oc' not in eph[prn]:
-            continue
-
-        eph_data = eph[prn-1]
-
-        # %% Find initial satellite clock correction -----------------------------
-        #--- Find time difference ---------------------------------------------
-        dt = check_t(transmitTime[satNr] - eph_data['t_oc'])
-
-        #--- Calculate clock correction ---------------------------------------
-        satClkCorr[satNr] = (eph_data['a_f2'] * dt + eph_data['a_f1']) * dt + \
-                             eph_data['a_f0'] - eph_data['T_GD']
-
-        time = transmitTime[satNr] - satClkCorr[satNr]
-
-        # %% Find satellite's position ------------------------------------------
-        # Restore semi-major axis
-        a = eph_data['sqrtA'] ** 2
-
-        # Time correction
-        tk = check_t(time - eph_data['t_oe'])
-
-        # Initial mean motion
-        n0 = np.sqrt(GM / a ** 3)
-        # Mean motion
-        n = n0 + eph_data['deltan']
-
-        # Mean anomaly
-        M = eph_data['M_0'] + n * tk
-        # Reduce mean anomaly to between 0 and 360 deg
-        M = np.remainder(M + 2 * gpsPi, 2 * gpsPi)
-
-        # Initial guess of eccentric anomaly
-        E = M
-
-        #--- Iteratively compute eccentric anomaly ----------------------------
-        for _ in range(10):
-            E_old = E
-            E = M + eph_data['e'] * np.sin(E)
-            dE = np.remainder(E - E_old, 2 * gpsPi)
-            if abs(dE) < 1e-12:
-                # Necessary precision is reached, exit from the loop
-                break
-        # Reduce eccentric anomaly to between 0 and 360 deg
-        E = np.remainder(E + 2 * gpsPi, 2 * gpsPi)
-
-        # Relativistic correction
-        dtr = F * eph_data['e'] * eph_data['sqrtA'] * np.sin(E)
-
-        # Calculate the true anomaly
-        nu = np.arctan2(np.sqrt(1 - eph_data['e'] ** 2) * np.sin(E), np.cos(E) - eph_data['e'])
-
-        # Compute angle phi
-        phi = nu + eph_data['omega']
-        # Reduce phi to between 0 and 360 deg
-        phi = np.remainder(phi, 2 * gpsPi)
-
-        # Correct argument of latitude
-        u = phi + eph_data['C_uc'] * np.cos(2 * phi) + eph_data['C_us'] * np.sin(2 * phi)
-        # Correct radius
-        r = a * (1 - eph_data['e'] * np.cos(E)) + eph_data['C_rc'] * np.cos(2 * phi) + eph_data['C_rs'] * np.sin(2 * phi)
-        # Correct inclination
-        i = eph_data['i_0'] + eph_data['iDot'] * tk + eph_data['C_ic'] * np.cos(2 * phi) + eph_data['C_is'] * np.sin(2 * phi)
-
-        # SV position in orbital plane
-        xk1 = np.cos(u) * r
-        yk1 = np.sin(u) * r
-
-        # Compute the angle between the ascending node and the Greenwich meridian
-        Omega = eph_data['omega_0'] + (eph_data['omegaDot'] - Omegae_dot) * tk - Omegae_dot * eph_data['t_oe']
-        # Reduce to between 0 and 360 deg
-        Omega = matlab_rem(Omega + 2 * gpsPi, 2 * gpsPi)
-
-        #--- Compute satellite coordinates ------------------------------------
-        xk = xk1 * np.cos(Omega) - yk1 * np.cos(i) * np.sin(Omega)
-        yk = xk1 * np.sin(Omega) + yk1 * np.cos(i) * np.cos(Omega)
-        zk = yk1 * np.sin(i)
-
-        satPositions[0, satNr] = xk
-        satPositions[1, satNr] = yk
-        satPositions[2, satNr] = zk
-
-        # %% Include relativistic correction in clock correction ----------------
-        satClkCorr[satNr] += dtr  # include relativistic correction
-
-        # %% The following is to calculate sv velocity (currently not used in this version)
+    # %% Initialize constants ===================================================
+    gpsPi = 3.1415926535898  # Pi used in the GPS coordinate system
+    Omegae_dot = 7.2921151467e-5  # Earth rotation rate, [rad/s]
+    GM = 3.986005e14  # Earth's universal gravitational constant, [m^3/s^2]
+    F = -4.442807633e-10  # Constant, [sec/(meter)^(1/2)]
+
+    e = ephRows[:, EPH_E]
+    sqrtA = ephRows[:, EPH_SQRT_A]
+    t_oe = ephRows[:, EPH_T_OE]
+
+    # %% Find initial satellite clock correction --------------------------------
+    #--- Find time difference ---------------------------------------------
+    dt = check_t(transmitTime - ephRows[:, EPH_T_OC])
+
+    #--- Calculate clock correction ---------------------------------------
+    clkCorr = (ephRows[:, EPH_A_F2] * dt + ephRows[:, EPH_A_F1]) * dt + \
+              ephRows[:, EPH_A_F0] - ephRows[:, EPH_T_GD]
+
+    time = transmitTime - clkCorr
+
+    # %% Find satellite's position ----------------------------------------------
+    # Restore semi-major axis
+    a = sqrtA ** 2
+
+    # Time correction
+    tk = check_t(time - t_oe)
+
+    # Initial mean motion
+    n0 = np.sqrt(GM / a ** 3)
+    # Mean motion
+    n = n0 + ephRows[:, EPH_DELTAN]
+
+    # Mean anomaly
+    M = ephRows[:, EPH_M_0] + n * tk
+    # Reduce mean anomaly to between 0 and 360 deg
+    M = np.remainder(M + 2 * gpsPi, 2 * gpsPi)
+
+    #--- Compute eccentric anomaly ----------------------------------------
+    if np.all(e < 0.3):
+        # Low eccentricity (always the case for GPS): closed form start
+        # value E = atan2(sin(M), cos(M) - e), written relative to M so that
+        # it is not wrapped to (-pi, pi], followed by one Newton correction
+        E = M + np.arctan2(e * np.sin(M), 1 - e * np.cos(M))
+        E = E - (E - e * np.sin(E) - M) / (1 - e * np.cos(E))
+    else:
+        # Initial guess of eccentric anomaly (Danby)
+        E = M + 0.85 * e * np.sign(np.sin(M))
+
+        # Danby's third order Newton-Raphson update of Kepler's equation
+        # f(E) = E - e*sin(E) - M. The convergence is quartic, 3 iterations are
+        # plenty for the small GPS eccentricities.
+        for _ in range(3):
+            sinE = np.sin(E)
+            cosE = np.cos(E)
+            f = E - e * sinE - M
+            fp = 1 - e * cosE
+            fpp = e * sinE
+            fppp = e * cosE
+            d1 = -f / fp
+            d2 = -f / (fp + d1 * fpp / 2)
+            d3 = -f / (fp + d2 * (fpp + d2 * fppp / 3) / 2)
+            E = E + d3
+    # Reduce eccentric anomaly to between 0 and 360 deg
+    E = np.remainder(E + 2 * gpsPi, 2 * gpsPi)
+    sinE = np.sin(E)
+    cosE = np.cos(E)
+
+    # Relativistic correction
+    dtr = F * e * sqrtA * sinE
+
+    # Calculate the true anomaly
+    nu = np.arctan2(np.sqrt(1 - e ** 2) * sinE, cosE - e)
+
+    # Compute angle phi
+    phi = nu + ephRows[:, EPH_OMEGA]
+    # Reduce phi to between 0 and 360 deg
+    phi = np.remainder(phi, 2 * gpsPi)
+
+    # Double angle terms of the harmonic corrections, from sin/cos of phi
+    sinphi = np.sin(phi)
+    cosphi = np.cos(phi)
+    sin2phi = 2 * sinphi * cosphi
+    cos2phi = 1 - 2 * sinphi * sinphi
+    # Correct argument of latitude
+    u = phi + ephRows[:, EPH_C_UC] * cos2phi + ephRows[:, EPH_C_US] * sin2phi
+    # Correct radius
+    r = a * (1 - e * cosE) + ephRows[:, EPH_C_RC] * cos2phi + ephRows[:, EPH_C_RS] * sin2phi
+    # Correct inclination
+    i = ephRows[:, EPH_I_0] + ephRows[:, EPH_I_DOT] * tk + ephRows[:, EPH_C_IC] * cos2phi + ephRows[:, EPH_C_IS] * sin2phi
+
+    # SV position in orbital plane
+    cosu = np.cos(u)
+    sinu = np.sin(u)
+    xk1 = cosu * r
+    yk1 = sinu * r
+
+    # Compute the angle between the ascending node and the Greenwich meridian
+    Omega = ephRows[:, EPH_OMEGA_0] + (ephRows[:, EPH_OMEGA_DOT] - Omegae_dot) * tk - Omegae_dot * t_oe
+    # Reduce to between 0 and 360 deg
+    Omega = matlab_rem(Omega + 2 * gpsPi, 2 * gpsPi)
+    cosOmega = np.cos(Omega)
+    sinOmega = np.sin(Omega)
+    cosi = np.cos(i)
+    sini = np.sin(i)
+
+    #--- Compute satellite coordinates ------------------------------------
+    xk = xk1 * cosOmega - yk1 * cosi * sinOmega
+    yk = xk1 * sinOmega + yk1 * cosi * cosOmega
+    zk = yk1 * sini
+
+    satPositions = np.empty((3, xk.size))
+    satPositions[0] = xk
+    satPositions[1] = yk
+    satPositions[2] = zk
+
+    # %% Include relativistic correction in clock correction --------------------
+    satClkCorr = clkCorr + dtr
+
+    # %% Calculate sv velocity and clock drift (reusing the terms above) --------
+    satVelocity = np.zeros((3, xk.size))
+    satClkCorrRat = np.zeros(xk.size)
+    if want_velocity:
         # Computation of SV velocity in ECEF -----------------------------------
-        # dE = n/(1-eph_data['e'] * np.cos(E))
-        # dphi = np.sqrt(1 - eph_data['e']**2) * dE / (1-eph_data['e'] * np.cos(E))
-        # du = dphi + 2*dphi*(-eph_data['C_uc'] * np.sin(2*phi) + eph_data['C_us'] * np.cos(2*phi))
-        # dr = a * eph_data['e'] * dE * np.sin(E) + 2*dphi*(-eph_data['C_rc'] * np.sin(2*phi) + eph_data['C_rs'] * np.cos(2*phi))
-        # di = eph_data['iDot'] + 2*dphi*(-eph_data['C_ic'] * np.sin(2*phi) + eph_data['C_is'] * np.cos(2*phi))
-        # dOmega = eph_data['omegaDot'] - Omegae_dot
-        # dxk1 = dr*np.cos(u) - r*du*np.sin(u)
-        # dyk1 = dr*np.sin(u) + r*du*np.cos(u)
-        # satVolocity[0, satNr] = -yk*dOmega - (dyk1*np.cos(i) - zk*di) * np.sin(Omega) + dxk1*np.cos(Omega)
-        # satVolocity[1, satNr] = xk*dOmega  + (dyk1*np.cos(i) - zk*di) * np.cos(Omega) + dxk1*np.sin(Omega)
-        # satVolocity[2, satNr] = dyk1*np.sin(i) + yk1*di*np.cos(i)
-        # dtrRat = F * eph_data['e'] * eph_data['sqrtA'] * np.cos(E) * dE
-        # satClkCorrRat[satNr] = 2* eph_data['a_f2'] * dt + eph_data['a_f1'] + dtrRat
+        dE = n / (1 - e * cosE)
+        dphi = np.sqrt(1 - e ** 2) * dE / (1 - e * cosE)
+        du = dphi + 2 * dphi * (-ephRows[:, EPH_C_UC] * sin2phi + ephRows[:, EPH_C_US] * cos2phi)
+        dr = a * e * dE * sinE + 2 * dphi * (-ephRows[:, EPH_C_RC] * sin2phi + ephRows[:, EPH_C_RS] * cos2phi)
+        di = ephRows[:, EPH_I_DOT] + 2 * dphi * (-ephRows[:, EPH_C_IC] * sin2phi + ephRows[:, EPH_C_IS] * cos2phi)
+        dOmega = ephRows[:, EPH_OMEGA_DOT] - Omegae_dot
+        dxk1 = dr * cosu - r * du * sinu
+        dyk1 = dr * sinu + r * du * cosu
+        satVelocity[0] = -yk * dOmega - (dyk1 * cosi - zk * di) * sinOmega + dxk1 * cosOmega
+        satVelocity[1] = xk * dOmega + (dyk1 * cosi - zk * di) * cosOmega + dxk1 * sinOmega
+        satVelocity[2] = dyk1 * sini + yk1 * di * cosi
+        # Clock drift, including the rate of the relativistic correction
+        dtrRat = F * e * sqrtA * cosE * dE
+        satClkCorrRat[:] = 2 * ephRows[:, EPH_A_F2] * dt + ephRows[:, EPH_A_F1] + dtrRat
+
+    return satPositions, satClkCorr, satVelocity, satClkCorrRat
+
+@dataclass
+class EphArrays:
+    """
+    Ephemerides of all satellites as one table: row PRN-1 holds the
+    parameters (columns in EPH_FIELDS order) of the satellite PRN. "valid" is
+    False for satellites without ephemeris.
+    """
+    valid: np.ndarray
+    table: np.ndarray
 
-    return satPositions, satClkCorr
+def eph_arrays(eph):
+    """
+    Converts the decoded ephemerides (list of dicts, element PRN-1 for
+    satellite PRN, see eph_structure_init) to an EphArrays structure. Fields
+    which were not decoded are stored as NaN. Build it once after the
+    navigation data is decoded and pass it to satpos.
+    """
+    def value(ephPrn, name):
+        v = ephPrn.get(name, [])
+        return np.nan if isinstance(v, list) and not v else float(v)
+
+    table = np.array([[value(ephPrn, name) for name in EPH_FIELDS] for ephPrn in eph])
+    valid = ~np.isnan(table).any(axis=1)
+    return EphArrays(valid=valid, table=table)
 
+@njit(cache=True)
 def check_t(time):
     """
-    Adjust time to be within half a GPS week.
+    Adjust time to be within half a GPS week. Works on scalars and arrays
+    (branch free: a week is subtracted or added where |time| exceeds half
+    a week).
     """
-    half_week = 302400  # seconds in half a GPS week
-    if time > half_week:
-        return time - 2 * half_week
-    elif time < -half_week:
-        return time + 2 * half_week
-    return time
+    half_week = 302400.0  # seconds in half a GPS week
+    return time - 2 * half_week * np.sign(time) * (np.abs(time) > half_week)
 
+@njit(cache=True)
 def matlab_rem(a, b):
     """
-    MATLAB-style remainder function.
+    MATLAB-style remainder function (b is a scalar, the reciprocal is taken
+    once).
     """
-    return a - b * np.fix(a / b)
+    return a - b * np.trunc(a * (1.0 / b))
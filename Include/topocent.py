@@ -1,3 +1,4 @@
+import math
 import numpy as np
 from Common.togeod import togeod
 
@@ -24,56 +25,108 @@ def topocent(X, dx):
     # $Id: topocent.m,v 1.1.1.1.2.4 2006/08/22 13:45:59 dpl Exp $
     # ==========================================================================
 
-    dtr = np.pi / 180
+    dtr = math.pi / 180
 
     # Ensure input vectors are 1D arrays of length 3
-    X = np.asarray(X)
-    if X.ndim == 2 and X.shape[0] == 1:
-        X = X.flatten()
+    X = np.ravel(X)
     if X.size != 3:
         raise ValueError("X must be a vector of length 3 (ECEF coordinates).")
-    dx = np.asarray(dx)
-    if dx.ndim == 2 and dx.shape[0] == 1:
-        dx = dx.flatten()
+    dx = np.ravel(dx)
     if dx.size != 3:
         raise ValueError("dx must be a vector of length 3 (ECEF delta).")
 
     # Geodetic coordinates of origin
     phi, lambda_, _ = togeod(6378137, 298.257223563, X[0], X[1], X[2])
 
-    # Trigonometric functions
-    cl = np.cos(lambda_ * dtr)
-    sl = np.sin(lambda_ * dtr)
-    cb = np.cos(phi * dtr)
-    sb = np.sin(phi * dtr)
+    # Trigonometric functions (of scalars, so math instead of NumPy)
+    cl = math.cos(lambda_ * dtr)
+    sl = math.sin(lambda_ * dtr)
+    cb = math.cos(phi * dtr)
+    sb = math.sin(phi * dtr)
 
     # Transformation matrix
-    F = np.array([[-sl, -sb * cl, cb * cl],
-                  [ cl, -sb * sl, cb * sl],
-                  [  0,     cb,      sb   ]])
+    F = np.empty((3, 3))
+    F[0] = (-sl, -sb * cl, cb * cl)
+    F[1] = ( cl, -sb * sl, cb * sl)
+    F[2] = (  0,     cb,      sb   )
 
     # Transform dx to local topocentric coordinates
-    local_vector = F.T @ dx
+    local_vector = F.T.dot(dx)
     E = local_vector[0]
     N = local_vector[1]
     U = local_vector[2]
 
     # Horizontal distance
-    hor_dis = np.sqrt(E**2 + N**2)
+    hor_dis = math.hypot(E, N)
 
     # Azimuth and elevation calculation
     if hor_dis < 1e-20:
         Az = 0
         El = 90
     else:
-        Az = np.degrees(np.arctan2(E, N))
-        El = np.degrees(np.arctan2(U, hor_dis))
+        Az = math.degrees(math.atan2(E, N))
+        El = math.degrees(math.atan2(U, hor_dis))
 
     # Ensure azimuth is positive
     if Az < 0:
         Az += 360
 
     # Vector length
-    D = np.linalg.norm(dx)
+    D = math.hypot(dx[0], dx[1], dx[2])
     # %%%%%%%%% end topocent.py %%%%%%%%%
-    return Az, El, D
\ No newline at end of file
+    return Az, El, D
+
+def topocent_batch(X, dx):
+    # TOPOCENT_BATCH  Transformation of the vectors dx into topocentric
+    #                 coordinate system with origin at X (topocent for a
+    #                 batch of vectors sharing one origin).
+    #
+    # [Az, El, D] = topocent_batch(X, dx)
+    #
+    #   Inputs:
+    #       X           - vector origin coordinates (in ECEF system [X, Y, Z])
+    #       dx          - vectors, one column per vector (3 by N)
+    #
+    #   Outputs:
+    #       D           - vector lengths. Units like units of the input
+    #       Az          - azimuths from north positive clockwise, degrees
+    #       El          - elevation angles, degrees
+    # ==========================================================================
+
+    dtr = np.pi / 180
+
+    # Geodetic coordinates of origin
+    phi, lambda_, _ = togeod(6378137, 298.257223563, X[0], X[1], X[2])
+
+    # Trigonometric functions
+    cl = np.cos(lambda_ * dtr)
+    sl = np.sin(lambda_ * dtr)
+    cb = np.cos(phi * dtr)
+    sb = np.sin(phi * dtr)
+
+    # Transformation matrix, built once for all vectors
+    F = np.array([[-sl, -sb * cl, cb * cl],
+                  [ cl, -sb * sl, cb * sl],
+                  [  0,     cb,      sb   ]])
+
+    # Transform dx to local topocentric coordinates (3 by N)
+    local_vectors = F.T @ dx
+    E = local_vectors[0]
+    N = local_vectors[1]
+    U = local_vectors[2]
+
+    # Horizontal distances
+    hor_dis = np.hypot(E, N)
+
+    # Azimuth and elevation calculation (straight up for a zero horizontal
+    # distance)
+    zenith = hor_dis < 1e-20
+    Az = np.where(zenith, 0.0, np.degrees(np.arctan2(E, N)))
+    El = np.where(zenith, 90.0, np.degrees(np.arctan2(U, hor_dis)))
+
+    # Ensure azimuth is positive
+    Az = np.where(Az < 0, Az + 360, Az)
+
+    # Vector lengths
+    D = np.linalg.norm(dx, axis=0)
+    return Az, El, D
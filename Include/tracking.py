@@ -1,8 +1,14 @@
 import numpy as np
-from .generateCAcode import generate_ca_code
-from Common.CNoVSM import cno_vsm
+from dataclasses import dataclass
+from .generateCAcode import get_ca
+from Common.CNoVSM import cno_vsm_from_power
 from Common.calcLoopCoef import calc_loop_coef
+from Include._io_utils import iq_to_complex, map_if_file, skip_samples
+from Common.jit import njit, NUMBA_AVAILABLE
+import math
 import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 def print_progress(loopCnt, codePeriods, channelNr, PRN, CNo):
     # Progress bar for tracking status
@@ -18,13 +24,515 @@ def print_progress(loopCnt, codePeriods, channelNr, PRN, CNo):
     if loopCnt == codePeriods:
         print()
 
-def tracking(fid, channel, settings):
+def init_result(settings):
+    """
+    Returns an empty tracking result structure for one channel.
+    """
+    # Channel status: No tracked signal, or lost lock
+    return {
+        'status': '-',  # No tracked signal, or lost lock
+        # The absolute sample in the record of the C/A code start:
+        'absoluteSample': np.zeros(settings.msToProcess),
+        # Freq of the PRN code:
+        'codeFreq': np.full(settings.msToProcess, np.inf),
+        # Frequency of the tracked carrier wave:
+        'carrFreq': np.full(settings.msToProcess, np.inf),
+        # Outputs from the correlators (In-phase), stored as float32:
+        'I_P': np.zeros(settings.msToProcess, dtype=np.float32),
+        'I_E': np.zeros(settings.msToProcess, dtype=np.float32),
+        'I_L': np.zeros(settings.msToProcess, dtype=np.float32),
+        # Outputs from the correlators (Quadrature-phase):
+        'Q_E': np.zeros(settings.msToProcess, dtype=np.float32),
+        'Q_P': np.zeros(settings.msToProcess, dtype=np.float32),
+        'Q_L': np.zeros(settings.msToProcess, dtype=np.float32),
+        # Loop discriminators
+        'dllDiscr': np.full(settings.msToProcess, np.inf),
+        'dllDiscrFilt': np.full(settings.msToProcess, np.inf),
+        'pllDiscr': np.full(settings.msToProcess, np.inf),
+        'pllDiscrFilt': np.full(settings.msToProcess, np.inf),
+        # Remain code and carrier phase
+        'remCodePhase': np.full(settings.msToProcess, np.inf),
+        'remCarrPhase': np.full(settings.msToProcess, np.inf),
+        # C/No
+        'CNo': {
+            'VSMValue': np.zeros(settings.msToProcess // settings.CNo.VSMinterval),
+            'VSMIndex': np.zeros(settings.msToProcess // settings.CNo.VSMinterval)
+        },
+        # PRN number
+        'PRN': 0
+    }
+
+
+def step_buffers(size):
+    """
+    Allocates the work arrays used by the NumPy version of tracking_step
+    for code periods of up to size samples. They are allocated once per
+    channel and reused for every code period.
+    """
+    return {
+        # Sample numbers 0..size (for code phases and carrier time)
+        'index': np.arange(size + 1, dtype=np.float64),
+        # Code phases and chip indices
+        'tcode': np.empty(size),
+        'tchip': np.empty(size),
+        'chip': np.empty(size, dtype=np.intp),
+        # Early, prompt and late code replicas
+        'earlyCode': np.empty(size, dtype=np.float32),
+        'promptCode': np.empty(size, dtype=np.float32),
+        'lateCode': np.empty(size, dtype=np.float32),
+        # Carrier phase, cos/sin and baseband signal
+        'trigarg': np.empty(size + 1),
+        'phase': np.empty(size, dtype=np.float32),
+        'cos': np.empty(size, dtype=np.float32),
+        'sin': np.empty(size, dtype=np.float32),
+        'iBaseband': np.empty(size, dtype=np.float32),
+        'qBaseband': np.empty(size, dtype=np.float32),
+        'tmp': np.empty(size, dtype=np.float32),
+    }
+
+def tracking_step(rawSignal, caCode, remCodePhase, codePhaseStep, carrFreq,
+                  remCarrPhase, samplingFreq, earlyLateSpc, codeLength, blksize,
+                  buffers=None):
+    """
+    Correlates one code period of the signal: generates the early, prompt
+    and late code replicas and the local carrier, mixes the signal to
+    baseband and accumulates the six correlator outputs. With Numba all of
+    this is done in one pass over the samples by a compiled kernel.
+
+    Inputs:
+        rawSignal     - samples of the code period (complex64 or float32).
+        caCode        - C/A code with one extra chip at each end (float32 for
+                        the NumPy version).
+        remCodePhase  - code phase of the first sample (chips).
+        codePhaseStep - code phase increment per sample (chips).
+        carrFreq      - carrier frequency (Hz).
+        remCarrPhase  - carrier phase of the first sample (rad).
+        samplingFreq  - sampling frequency (Hz).
+        earlyLateSpc  - early-late correlator spacing (chips).
+        codeLength    - number of chips in a code period.
+        blksize       - number of samples in the code period.
+        buffers       - work arrays from step_buffers (NumPy version only;
+                        allocated here if missing or too short).
+    Outputs:
+        I_E, Q_E, I_P, Q_P, I_L, Q_L - correlator outputs.
+        remCodePhase  - code phase after the code period.
+        remCarrPhase  - carrier phase after the code period.
+    """
+    if NUMBA_AVAILABLE:
+        iq = np.iscomplexobj(rawSignal)
+        return _tracking_step(rawSignal.view(np.float32) if iq else rawSignal, iq,
+                              caCode, remCodePhase, codePhaseStep, carrFreq, remCarrPhase,
+                              samplingFreq, earlyLateSpc, codeLength, blksize)
+
+    if buffers is None or len(buffers['tcode']) < blksize:
+        buffers = step_buffers(blksize)
+    # Views of the work arrays for this code period
+    b = {name: buf[:blksize] for name, buf in buffers.items()}
+
+    # --- Set up all the code phase tracking information ----------------------
+    # Code phase offsets of the samples
+    tcode = np.multiply(b['index'], codePhaseStep, out=b['tcode'])
+
+    # Define index into the code vector (for a code phase offset)
+    def ca_slice(offset, out):
+        tchip = np.add(tcode, remCodePhase + offset, out=b['tchip'])
+        np.ceil(tchip, out=tchip)
+        np.clip(tchip, 0, len(caCode) - 1, out=tchip)
+        chip = b['chip']
+        chip[:] = tchip
+        return np.take(caCode, chip, out=out)
+
+    earlyCode = ca_slice(-earlyLateSpc, b['earlyCode'])
+    lateCode = ca_slice(earlyLateSpc, b['lateCode'])
+    promptCode = ca_slice(0.0, b['promptCode'])
+
+    # Remaining code phase for each tracking update
+    remCodePhase = (remCodePhase + tcode[-1] + codePhaseStep) - codeLength
+
+    # --- Generate the carrier frequency to mix the signal to baseband --------
+    # Get the argument to sin/cos functions
+    trigarg = buffers['trigarg'][:blksize + 1]
+    np.divide(buffers['index'][:blksize + 1], samplingFreq, out=trigarg)
+    np.multiply(trigarg, 2.0 * np.pi * carrFreq, out=trigarg)
+    np.add(trigarg, remCarrPhase, out=trigarg)
+    # Remaining carrier phase for each tracking update
+    remCarrPhase = np.remainder(trigarg[-1], 2 * np.pi)
+
+    # Finally compute the carrier to mix the collected data to baseband
+    # (the phase is reduced to single precision only after it is formed)
+    phase = b['phase']
+    phase[:] = trigarg[:-1]
+    cos_t = np.cos(phase, out=b['cos'])
+    sin_t = np.sin(phase, out=b['sin'])
+
+    # --- Do correlation to Generate the six standard accumulated values ------
+    # First mix to baseband: multiplication by exp(-j*phase)
+    iBaseband, qBaseband, tmp = b['iBaseband'], b['qBaseband'], b['tmp']
+    if np.iscomplexobj(rawSignal):
+        rawR = rawSignal.real[:blksize]
+        rawI = rawSignal.imag[:blksize]
+        np.multiply(cos_t, rawR, out=iBaseband)
+        iBaseband += np.multiply(sin_t, rawI, out=tmp)
+        np.multiply(cos_t, rawI, out=qBaseband)
+        qBaseband -= np.multiply(sin_t, rawR, out=tmp)
+    else:
+        np.multiply(cos_t, rawSignal[:blksize], out=iBaseband)
+        np.multiply(sin_t, rawSignal[:blksize], out=qBaseband)
+        np.negative(qBaseband, out=qBaseband)
+
+    # Now get early, late, and prompt values for each (dot products)
+    I_E, Q_E = float(np.dot(earlyCode, iBaseband)), float(np.dot(earlyCode, qBaseband))
+    I_P, Q_P = float(np.dot(promptCode, iBaseband)), float(np.dot(promptCode, qBaseband))
+    I_L, Q_L = float(np.dot(lateCode, iBaseband)), float(np.dot(lateCode, qBaseband))
+
+    return I_E, Q_E, I_P, Q_P, I_L, Q_L, remCodePhase, remCarrPhase
+
+@njit(fastmath=True, boundscheck=False, cache=True)
+def _tracking_step(samples, iq, caCode, remCodePhase, codePhaseStep, carrFreq,
+                   remCarrPhase, samplingFreq, earlyLateSpc, codeLength, blksize):
+    # samples are the stored samples of any type, interleaved I/Q if iq is
+    # True (Numba compiles one specialization per sample type)
+    last = caCode.size - 1
+    carrPhaseStep = 2.0 * np.pi * carrFreq / samplingFreq
+    # Integer code NCO: code phases in chips as 64 bit fixed point numbers
+    # with 32 fractional bits
+    codeFix = np.int64(np.round(remCodePhase * 4294967296.0))
+    stepFix = np.int64(np.round(codePhaseStep * 4294967296.0))
+    spcFix = np.int64(np.round(earlyLateSpc * 4294967296.0))
+    # The carrier is rotated by a fixed angle per sample (angle addition
+    # recurrence); it is re-seeded from cos/sin every 1000 samples to keep
+    # the accumulated rounding error negligible
+    dc = np.cos(carrPhaseStep)
+    ds = np.sin(carrPhaseStep)
+    c = s = 0.0
+    I_E = Q_E = I_P = Q_P = I_L = Q_L = 0.0
+    for i in range(blksize):
+        # Code replicas: the chip index is ceil(code phase), as in the NumPy
+        # version, computed as -floor(-phase) with an arithmetic shift
+        earlyCode = caCode[min(max(-((spcFix - codeFix) >> 32), 0), last)]
+        promptCode = caCode[min(max(-((-codeFix) >> 32), 0), last)]
+        lateCode = caCode[min(max(-((-codeFix - spcFix) >> 32), 0), last)]
+        codeFix += stepFix
+        # Mix to baseband with the local carrier exp(-j*phase)
+        if i % 1000 == 0:
+            phase = remCarrPhase + i * carrPhaseStep
+            c = np.cos(phase)
+            s = np.sin(phase)
+        if iq:
+            xI = float(samples[2 * i])
+            xQ = float(samples[2 * i + 1])
+        else:
+            xI = float(samples[i])
+            xQ = 0.0
+        iBaseband = c * xI + s * xQ
+        qBaseband = c * xQ - s * xI
+        # Accumulate
+        I_E += earlyCode * iBaseband
+        Q_E += earlyCode * qBaseband
+        I_P += promptCode * iBaseband
+        Q_P += promptCode * qBaseband
+        I_L += lateCode * iBaseband
+        Q_L += lateCode * qBaseband
+        # Carrier of the next sample
+        c, s = c * dc - s * ds, s * dc + c * ds
+    remCodePhase = (remCodePhase + (blksize - 1) * codePhaseStep + codePhaseStep) - codeLength
+    remCarrPhase = np.remainder(remCarrPhase + blksize * carrPhaseStep, 2 * np.pi)
+    return I_E, Q_E, I_P, Q_P, I_L, Q_L, remCodePhase, remCarrPhase
+
+def _step_function(iq, caCode, samplingFreq, earlyLateSpc, codeLength, size):
+    """
+    Returns the correlator of one channel, specialized for its sample
+    format, so that the tracking loop does not branch on it for every code
+    period:
+
+        step_fn(raw_array, remCodePhase, codePhaseStep, carrFreq, remCarrPhase, blksize)
+
+    returns the outputs of tracking_step for the stored samples raw_array
+    (interleaved I/Q if iq is True) of one code period.
+
+    With Numba the compiled kernel reads the stored samples directly; it is
+    compiled once for each sample type (int8, int16, float32). Otherwise the
+    samples are first converted to single precision (complex64 for I/Q
+    data) in a buffer for code periods of up to size samples, which is
+    reused like the work arrays of the NumPy correlator.
+    """
+    if NUMBA_AVAILABLE:
+        def step_fn(raw_array, remCodePhase, codePhaseStep, carrFreq, remCarrPhase, blksize):
+            return _tracking_step(raw_array, iq, caCode, remCodePhase, codePhaseStep,
+                                  carrFreq, remCarrPhase, samplingFreq, earlyLateSpc,
+                                  codeLength, blksize)
+        return step_fn
+
+    buffers = step_buffers(size)
+    # The code replicas are taken into float32 buffers
+    caCode = caCode.astype(np.float32)
+    sig_buf = np.empty(size, dtype=np.complex64 if iq else np.float32)
+
+    def step_fn(raw_array, remCodePhase, codePhaseStep, carrFreq, remCarrPhase, blksize):
+        nonlocal sig_buf
+        if blksize > len(sig_buf):
+            sig_buf = np.empty(blksize, dtype=sig_buf.dtype)
+        rawSignal = sig_buf[:blksize]
+        if iq:
+            iq_to_complex(raw_array, out=rawSignal)
+        else:
+            rawSignal[:] = raw_array
+        return tracking_step(rawSignal, caCode, remCodePhase, codePhaseStep, carrFreq,
+                             remCarrPhase, samplingFreq, earlyLateSpc, codeLength,
+                             blksize, buffers)
+    return step_fn
+
+@dataclass
+class LoopFilterGains:
+    """
+    Gains of the DLL and PLL loop filters. They depend on the settings only
+    (noise bandwidths, damping ratios and integration time), so they are
+    computed once by loop_filter_gains and shared by all channels.
+    """
+    code1: float
+    code2: float
+    carr1: float
+    carr2: float
+
+def loop_filter_gains(settings):
+    """
+    Computes the DLL and PLL loop filter gains from the settings.
+
+    Inputs:
+        settings      - receiver settings.
+    Outputs:
+        gains         - LoopFilterGains; the filter update is
+                        nco += gain1 * (error - oldError) + gain2 * error.
+    """
+    # --- DLL variables ---------------------------------------------------------
+    # Summation interval
+    PDIcode = settings.intTime
+    # Calculate filter coefficient values
+    tau1code, tau2code = calc_loop_coef(settings.dllNoiseBandwidth, settings.dllDampingRatio, 1.0)
+
+    # --- PLL variables ---------------------------------------------------------
+    # Summation interval
+    PDIcarr = settings.intTime
+    # Calculate filter coefficient values
+    tau1carr, tau2carr = calc_loop_coef(settings.pllNoiseBandwidth, settings.pllDampingRatio, 0.25)
+
+    # Filter gains (constant over the run, so divided out once here)
+    return LoopFilterGains(code1=tau2code / tau1code, code2=PDIcode / tau1code,
+                           carr1=tau2carr / tau1carr, carr2=PDIcarr / tau1carr)
+
+def track_channel(data, channelNr, ch, settings, show_progress=True, gains=None):
+    """
+    Performs code and carrier tracking of one channel.
+
+    Inputs:
+        data          - samples of the whole signal record (see map_if_file).
+        channelNr     - channel number (used for messages only).
+        ch            - channel record (preRun.CHANNEL_DTYPE) with a non zero PRN.
+        settings      - receiver settings.
+        show_progress - print the progress bar while tracking.
+        gains         - loop filter gains (see loop_filter_gains); computed
+                        from the settings if not given.
+
+    Outputs:
+        tr            - tracking results of the channel (see tracking).
+    """
+    # === Initialize tracking variables ===========================================
+    # Signal period to be processed
+    codePeriods = settings.msToProcess  # For GPS one C/A code is one ms
+
+    # --- DLL variables ---------------------------------------------------------
+    # Define early-late offset (in chips)
+    earlyLateSpc = settings.dllCorrelatorSpacing
+
+    # --- Loop filter gains (the same for all channels), as local names ------
+    if gains is None:
+        gains = loop_filter_gains(settings)
+    gain1code, gain2code = gains.code1, gains.code2
+    gain1carr, gain2carr = gains.carr1, gains.carr2
+
+    # Data adaptation coefficient (1 for real, 2 for complex)
+    dataAdaptCoeff = 1 if settings.fileType == 1 else 2
+
+    # Fields of the channel record, as Python scalars
+    prn = int(ch['PRN'])
+    codePhase = int(ch['codePhase'])
+
+    # Save additional information - the channel's tracked PRN
+    tr = init_result(settings)
+    tr['PRN'] = prn
+
+    # Plain array view of the record (the compiled kernels take ndarrays)
+    data = np.asarray(data)
+
+    # Move the starting point of processing. Can be used to start the
+    # signal processing at any point in the data record (e.g. for long
+    # records). In addition skip through that data file to start at the
+    # appropriate sample (corresponding to code phase).
+    sample_offset = skip_samples(settings) + codePhase * dataAdaptCoeff
+
+    # Get a vector with the C/A code sampled 1x/chip, with one extra chip at
+    # each end to make it possible to do early and late versions
+    caCode = get_ca(prn)
+
+    samplingFreq = settings.samplingFreq
+    codeLength = settings.codeLength
+
+    # --- Correlator for the sample format, chosen once per channel ----------
+    step_fn = _step_function(dataAdaptCoeff == 2, caCode, samplingFreq, earlyLateSpc,
+                             codeLength, 2 * settings.samples_per_code)
+
+    # --- Perform various initializations ------------------------------------
+    # Define initial code frequency basis of NCO
+    codeFreq = settings.codeFreqBasis
+    # Define residual code phase (in chips)
+    remCodePhase = 0.0
+    # Define carrier frequency which is used over whole tracking period
+    carrFreq = float(ch['acquiredFreq'])
+    carrFreqBasis = carrFreq
+    # Define residual carrier phase
+    remCarrPhase = 0.0
+
+    # Code tracking loop parameters
+    oldCodeNco = oldCodeError = 0.0
+    # Carrier/Costas loop parameters
+    oldCarrNco = oldCarrError = 0.0
+    # C/No computation: ring buffer of the prompt powers of the current VSM
+    # interval, allocated once per channel (written at loopCnt % VSMinterval)
+    vsmCnt = 0
+    CNo = 0
+    vsmZ = np.zeros(settings.CNo.VSMinterval)
+
+    # Result arrays and settings used in the loop, bound to local names once
+    # (instead of a dict or attribute lookup per code period)
+    trAbsoluteSample = tr['absoluteSample']
+    trCodeFreq, trCarrFreq = tr['codeFreq'], tr['carrFreq']
+    trI_E, trI_P, trI_L = tr['I_E'], tr['I_P'], tr['I_L']
+    trQ_E, trQ_P, trQ_L = tr['Q_E'], tr['Q_P'], tr['Q_L']
+    trDllDiscr, trDllDiscrFilt = tr['dllDiscr'], tr['dllDiscrFilt']
+    trPllDiscr, trPllDiscrFilt = tr['pllDiscr'], tr['pllDiscrFilt']
+    trRemCodePhase, trRemCarrPhase = tr['remCodePhase'], tr['remCarrPhase']
+    trVSMValue, trVSMIndex = tr['CNo']['VSMValue'], tr['CNo']['VSMIndex']
+    codeFreqBasis = settings.codeFreqBasis
+    VSMinterval = settings.CNo.VSMinterval
+    accTime = settings.CNo.accTime
+
+    # Code period at which the progress bar is next updated (never if it is
+    # not shown)
+    next_report_ms = 0 if show_progress and not settings.quiet else codePeriods
+
+    # === Process the number of specified code periods =======================
+    for loopCnt in range(codePeriods):
+
+        # --- Progress Bar / GUI update --------------------------------------
+        # The progress bar is updated every 100ms (of signal).
+        if loopCnt >= next_report_ms:
+            print_progress(loopCnt + 1, codePeriods, channelNr, prn, CNo)
+            next_report_ms = min(loopCnt + 100, codePeriods - 1)
+
+        # Record sample number (based on 8bit samples)
+        trAbsoluteSample[loopCnt] = sample_offset / dataAdaptCoeff
+
+        # Update the phasestep based on code freq (variable) and sampling frequency (fixed)
+        codePhaseStep = codeFreq / samplingFreq
+
+        # Find the size of a "block" or code period in whole samples
+        # (math.ceil returns the int directly, without a NumPy scalar)
+        blksize = math.ceil((codeLength - remCodePhase) / codePhaseStep)
+
+        # Read in the appropriate number of samples to process this iteration
+        num_elements = dataAdaptCoeff * blksize
+        if sample_offset + num_elements > len(data):
+            print(f"Not enough samples on channel {channelNr}. Expected {num_elements}, "
+                  f"got {max(0, len(data) - sample_offset)}. Exiting.")
+            return tr
+
+        # A view of the mapped record
+        raw_array = data[sample_offset:sample_offset + num_elements]
+        sample_offset += num_elements
+
+        # Save remCodePhase and remCarrPhase for current correlation
+        trRemCodePhase[loopCnt] = remCodePhase
+        trRemCarrPhase[loopCnt] = remCarrPhase
+
+        # --- Mix to baseband and generate the six standard accumulated values
+        I_E, Q_E, I_P, Q_P, I_L, Q_L, remCodePhase, remCarrPhase = step_fn(
+            raw_array, remCodePhase, codePhaseStep, carrFreq, remCarrPhase, blksize)
+
+        # --- Find PLL error and update carrier NCO ---------------------------
+        # Implement carrier loop discriminator (phase detector)
+        carrError = np.arctan(Q_P / I_P) / (2.0 * np.pi)
+        # Implement carrier loop filter and generate NCO command
+        carrNco = oldCarrNco + gain1carr * (carrError - oldCarrError) + carrError * gain2carr
+        oldCarrNco, oldCarrError = carrNco, carrError
+
+        # Save carrier frequency for current correlation
+        trCarrFreq[loopCnt] = carrFreq
+        # Modify carrier freq based on NCO command
+        carrFreq = carrFreqBasis + carrNco
+
+        # --- Find DLL error and update code NCO ------------------------------
+        # (early minus late amplitude normalized by their sum; NaN if both are zero)
+        early = math.sqrt(I_E * I_E + Q_E * Q_E)
+        late = math.sqrt(I_L * I_L + Q_L * Q_L)
+        codeError = (early - late) / (early + late) if early + late else np.nan
+        # Implement code loop filter and generate NCO command
+        codeNco = oldCodeNco + gain1code * (codeError - oldCodeError) + codeError * gain2code
+        oldCodeNco, oldCodeError = codeNco, codeError
+
+        # Save code frequency for current correlation
+        trCodeFreq[loopCnt] = codeFreq
+        # Modify code freq based on NCO command
+        codeFreq = codeFreqBasis - codeNco
+
+        # --- Record various measures to show in postprocessing ----------------
+        trDllDiscr[loopCnt] = codeError
+        trDllDiscrFilt[loopCnt] = codeNco
+        trPllDiscr[loopCnt] = carrError
+        trPllDiscrFilt[loopCnt] = carrNco
+        trI_E[loopCnt], trI_P[loopCnt], trI_L[loopCnt] = I_E, I_P, I_L
+        trQ_E[loopCnt], trQ_P[loopCnt], trQ_L[loopCnt] = Q_E, Q_P, Q_L
+
+        # --- CNo calculation -------------------------------------------------
+        writeIdx = loopCnt % VSMinterval
+        vsmZ[writeIdx] = I_P * I_P + Q_P * Q_P
+        if writeIdx == VSMinterval - 1:
+            vsmCnt += 1
+            cno_val = cno_vsm_from_power(vsmZ, accTime)
+            trVSMValue[vsmCnt - 1] = cno_val
+            trVSMIndex[vsmCnt - 1] = loopCnt + 1
+            CNo = int(cno_val) if not np.isnan(cno_val) else 'NaN'
+
+    # If we got so far, this means that the tracking was successful
+    # Now we only copy status, but it can be updated by a lock detector if implemented
+    tr['status'] = str(ch['status'])
+
+    return tr
+
+# Settings and memory map of the signal record of a tracking worker process
+# (set once per process by _init_worker)
+_worker = {}
+
+def _init_worker(settings):
+    # Initializer of the parallel tracking workers: the settings are sent
+    # to each process once (not with every channel), and each process reads
+    # the signal record through its own memory map
+    _worker['settings'] = settings
+    _worker['data'] = map_if_file(settings)
+    _worker['gains'] = loop_filter_gains(settings)
+
+def _track_channel_file(channelNr, ch):
+    # Worker entry point for parallel tracking
+    return track_channel(_worker['data'], channelNr, ch, _worker['settings'],
+                         show_progress=False, gains=_worker['gains'])
+
+def tracking(data, channel, settings):
     """
     Performs code and carrier tracking for all channels.
 
     Inputs:
-        fid      - file identifier of the signal record.
-        channel  - PRN, carrier frequencies and code phases of all satellites to be tracked.
+        data     - samples of the whole signal record (see map_if_file).
+        channel  - PRN, carrier frequencies and code phases of all satellites to be tracked
+                   (structured array of preRun.CHANNEL_DTYPE records).
         settings - receiver settings.
 
     Outputs:
@@ -57,237 +565,36 @@ def tracking(fid, channel, settings):
     # USA.
     #--------------------------------------------------------------------------
 
-    # === Initialize result structure ============================================
-    def init_result():
-        # Channel status: No tracked signal, or lost lock
-        return {
-            'status': '-',  # No tracked signal, or lost lock
-            # The absolute sample in the record of the C/A code start:
-            'absoluteSample': np.zeros(settings.msToProcess),
-            # Freq of the PRN code:
-            'codeFreq': np.full(settings.msToProcess, np.inf),
-            # Frequency of the tracked carrier wave:
-            'carrFreq': np.full(settings.msToProcess, np.inf),
-            # Outputs from the correlators (In-phase):
-            'I_P': np.zeros(settings.msToProcess),
-            'I_E': np.zeros(settings.msToProcess),
-            'I_L': np.zeros(settings.msToProcess),
-            # Outputs from the correlators (Quadrature-phase):
-            'Q_E': np.zeros(settings.msToProcess),
-            'Q_P': np.zeros(settings.msToProcess),
-            'Q_L': np.zeros(settings.msToProcess),
-            # Loop discriminators
-            'dllDiscr': np.full(settings.msToProcess, np.inf),
-            'dllDiscrFilt': np.full(settings.msToProcess, np.inf),
-            'pllDiscr': np.full(settings.msToProcess, np.inf),
-            'pllDiscrFilt': np.full(settings.msToProcess, np.inf),
-            # Remain code and carrier phase
-            'remCodePhase': np.full(settings.msToProcess, np.inf),
-            'remCarrPhase': np.full(settings.msToProcess, np.inf),
-            # C/No
-            'CNo': {
-                'VSMValue': np.zeros(settings.msToProcess // settings.CNo.VSMinterval),
-                'VSMIndex': np.zeros(settings.msToProcess // settings.CNo.VSMinterval)
-            },
-            # PRN number
-            'PRN': 0
-        }
-
     # Copy initial settings for all channels
-    trackResults = [init_result() for _ in range(settings.numberOfChannels)]
-
-    # === Initialize tracking variables ==========================================
-    # Signal period to be processed
-    codePeriods = settings.msToProcess  # For GPS one C/A code is one ms
-
-    # --- DLL variables ---------------------------------------------------------
-    # Define early-late offset (in chips)
-    earlyLateSpc = settings.dllCorrelatorSpacing
-    # Summation interval
-    PDIcode = settings.intTime
-    # Calculate filter coefficient values
-    tau1code, tau2code = calc_loop_coef(settings.dllNoiseBandwidth, settings.dllDampingRatio, 1.0)
+    trackResults = [init_result(settings) for _ in range(settings.numberOfChannels)]
 
-    # --- PLL variables ---------------------------------------------------------
-    # Summation interval
-    PDIcarr = settings.intTime
-    # Calculate filter coefficient values
-    tau1carr, tau2carr = calc_loop_coef(settings.pllNoiseBandwidth, settings.pllDampingRatio, 0.25)
-
-    # Data adaptation coefficient (1 for real, 2 for complex)
-    dataAdaptCoeff = 1 if settings.fileType == 1 else 2
+    # Only process channels with a non zero PRN (acquisition was successful)
+    active = [channelNr for channelNr in range(settings.numberOfChannels)
+              if channel[channelNr]['PRN'] != 0]
 
     # === Start processing channels ==============================================
-    for channelNr in range(settings.numberOfChannels):
-
-        ch = channel[channelNr]
-        # Only process if PRN is non zero (acquisition was successful)
-        if ch['PRN'] == 0:
-            continue
-
-        # Save additional information - each channel's tracked PRN
-        trackResults[channelNr]['PRN'] = ch['PRN']
-
-        # Move the starting point of processing. Can be used to start the
-        # signal processing at any point in the data record (e.g. for long
-        # records). In addition skip through that data file to start at the
-        # appropriate sample (corresponding to code phase).
-        bytes_per_element = 2 if settings.dataType == 'int16' else 1
-        seek_offset = (settings.skipNumberOfBytes + ch['codePhase'] * dataAdaptCoeff) * bytes_per_element
-        fid.seek(seek_offset, 0)
-
-        # Get a vector with the C/A code sampled 1x/chip
-        caCode = generate_ca_code(ch['PRN'])
-        # Then make it possible to do early and late versions
-        caCode = np.concatenate([[caCode[-1]], caCode, [caCode[0]]])
-
-        # --- Perform various initializations ------------------------------------
-        # Define initial code frequency basis of NCO
-        codeFreq = settings.codeFreqBasis
-        # Define residual code phase (in chips)
-        remCodePhase = 0.0
-        # Define carrier frequency which is used over whole tracking period
-        carrFreq = ch['acquiredFreq']
-        carrFreqBasis = carrFreq
-        # Define residual carrier phase
-        remCarrPhase = 0.0
-
-        # Code tracking loop parameters
-        oldCodeNco = oldCodeError = 0.0
-        # Carrier/Costas loop parameters
-        oldCarrNco = oldCarrError = 0.0
-        # C/No computation
-        vsmCnt = 0
-        CNo = 0
-
-        # === Process the number of specified code periods =======================
-        for loopCnt in range(settings.msToProcess):
-
-            # --- Progress Bar / GUI update --------------------------------------
-            # The progress bar is updated every 50ms.
-            if loopCnt % 50 == 0 or loopCnt == settings.msToProcess - 1:
-                print_progress(loopCnt + 1, settings.msToProcess, channelNr, ch['PRN'], CNo)
-
-            # Record sample number (based on 8bit samples)
-            trackResults[channelNr]['absoluteSample'][loopCnt] = fid.tell() / dataAdaptCoeff / (2 if settings.dataType == 'int16' else 1)
-
-            # Update the phasestep based on code freq (variable) and sampling frequency (fixed)
-            codePhaseStep = codeFreq / settings.samplingFreq
-
-            # Find the size of a "block" or code period in whole samples
-            blksize = int(np.ceil((settings.codeLength - remCodePhase) / codePhaseStep))
-
-            # Read in the appropriate number of samples to process this iteration
-            bytes_per_element = 2 if settings.dataType == 'int16' else 1
-            num_elements = dataAdaptCoeff * blksize
-            num_bytes = num_elements * bytes_per_element
-
-            raw_bytes = fid.read(num_bytes)
-            if len(raw_bytes) < num_bytes:
-                print(f"Not enough bytes read on channel {channelNr}. Expected {num_bytes}, got {len(raw_bytes)}. Exiting.")
-                return trackResults, channel
-
-            raw_array = np.frombuffer(raw_bytes, dtype=np.int16 if settings.dataType == 'int16' else np.int8)
-
-            # For complex data
-            if dataAdaptCoeff == 2:
-                # check even number of elements
-                if len(raw_array) % 2 != 0:
-                    raw_array = raw_array[:-1]
-                rawSignal = raw_array[::2] + 1j * raw_array[1::2]
-            else:
-                rawSignal = raw_array.astype(np.float64)
-
-            # --- Set up all the code phase tracking information ------------------
-            # Save remCodePhase for current correlation
-            trackResults[channelNr]['remCodePhase'][loopCnt] = remCodePhase
-
-            # Define index into early code vector
-            def ca_slice(tcode):
-                idx = np.ceil(tcode).astype(int)
-                return caCode[np.clip(idx, 0, len(caCode) - 1)]
-
-            tcode = remCodePhase - earlyLateSpc + np.arange(blksize) * codePhaseStep
-            earlyCode = ca_slice(tcode)
-
-            tcode = remCodePhase + earlyLateSpc + np.arange(blksize) * codePhaseStep
-            lateCode = ca_slice(tcode)
-
-            tcode = remCodePhase + np.arange(blksize) * codePhaseStep
-            promptCode = ca_slice(tcode)
-
-            # Remaining code phase for each tracking update
-            remCodePhase = (tcode[-1] + codePhaseStep) - settings.codeLength
-
-            # --- Generate the carrier frequency to mix the signal to baseband ----
-            # Save remCarrPhase for current correlation
-            trackResults[channelNr]['remCarrPhase'][loopCnt] = remCarrPhase
-
-            # Get the argument to sin/cos functions
-            time = np.arange(blksize + 1) / settings.samplingFreq
-            trigarg = 2.0 * np.pi * carrFreq * time + remCarrPhase
-            # Remaining carrier phase for each tracking update
-            remCarrPhase = np.remainder(trigarg[-1], 2 * np.pi)
-
-            # Finally compute the signal to mix the collected data to baseband
-            carrsig = np.exp(-1j * trigarg[:-1])
-
-            # --- Do correlation to Generate the six standard accumulated values ---
-            # First mix to baseband
-            iBaseband = np.real(carrsig * rawSignal[:blksize])
-            qBaseband = np.imag(carrsig * rawSignal[:blksize])
-
-            # Now get early, late, and prompt values for each
-            I_E, Q_E = np.sum(earlyCode * iBaseband), np.sum(earlyCode * qBaseband)
-            I_P, Q_P = np.sum(promptCode * iBaseband), np.sum(promptCode * qBaseband)
-            I_L, Q_L = np.sum(lateCode * iBaseband), np.sum(lateCode * qBaseband)
-
-            # --- Find PLL error and update carrier NCO ---------------------------
-            # Implement carrier loop discriminator (phase detector)
-            carrError = np.arctan(Q_P / I_P) / (2.0 * np.pi)
-            # Implement carrier loop filter and generate NCO command
-            carrNco = oldCarrNco + (tau2carr / tau1carr) * (carrError - oldCarrError) + carrError * (PDIcarr / tau1carr)
-            oldCarrNco, oldCarrError = carrNco, carrError
-
-            # Save carrier frequency for current correlation
-            trackResults[channelNr]['carrFreq'][loopCnt] = carrFreq
-            # Modify carrier freq based on NCO command
-            carrFreq = carrFreqBasis + carrNco
-
-            # --- Find DLL error and update code NCO ------------------------------
-            codeError = (np.hypot(I_E, Q_E) - np.hypot(I_L, Q_L)) / (np.hypot(I_E, Q_E) + np.hypot(I_L, Q_L))
-            # Implement code loop filter and generate NCO command
-            codeNco = oldCodeNco + (tau2code / tau1code) * (codeError - oldCodeError) + codeError * (PDIcode / tau1code)
-            oldCodeNco, oldCodeError = codeNco, codeError
-
-            # Save code frequency for current correlation
-            trackResults[channelNr]['codeFreq'][loopCnt] = codeFreq
-            # Modify code freq based on NCO command
-            codeFreq = settings.codeFreqBasis - codeNco
-
-            # --- Record various measures to show in postprocessing ----------------
-            tr = trackResults[channelNr]
-            tr['dllDiscr'][loopCnt] = codeError
-            tr['dllDiscrFilt'][loopCnt] = codeNco
-            tr['pllDiscr'][loopCnt] = carrError
-            tr['pllDiscrFilt'][loopCnt] = carrNco
-            tr['I_E'][loopCnt], tr['I_P'][loopCnt], tr['I_L'][loopCnt] = I_E, I_P, I_L
-            tr['Q_E'][loopCnt], tr['Q_P'][loopCnt], tr['Q_L'][loopCnt] = Q_E, Q_P, Q_L
-
-            # --- CNo calculation -------------------------------------------------
-            if (loopCnt + 1) % settings.CNo.VSMinterval == 0:
-                vsmCnt += 1
-                cno_val = cno_vsm(
-                    tr['I_P'][loopCnt - settings.CNo.VSMinterval + 1:loopCnt + 1],
-                    tr['Q_P'][loopCnt - settings.CNo.VSMinterval + 1:loopCnt + 1],
-                    settings.CNo.accTime
-                )
-                tr['CNo']['VSMValue'][vsmCnt - 1] = cno_val
-                tr['CNo']['VSMIndex'][vsmCnt - 1] = loopCnt + 1
-                CNo = int(cno_val) if not np.isnan(cno_val) else 'NaN'
-
-        # If we got so far, this means that the tracking was successful
-        # Now we only copy status, but it can be updated by a lock detector if implemented
-        trackResults[channelNr]['status'] = ch['status']
+    # Channels are independent, so they can be tracked in separate processes.
+    # The workers are spawned rather than forked: a fork of a process in
+    # which the parallel Numba kernels have started their threads can hang.
+    # Each worker receives the settings once, maps the record itself,
+    # computes the loop filter gains and loads the compiled kernels from the
+    # Numba cache.
+    workers = min(settings.trackingWorkers, len(active))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(settings,)) as pool:
+            futures = {channelNr: pool.submit(_track_channel_file, channelNr,
+                                              channel[channelNr])
+                       for channelNr in active}
+            for channelNr, future in futures.items():
+                trackResults[channelNr] = future.result()
+                print(f'   Channel {channelNr + 1} (PRN {trackResults[channelNr]["PRN"]}) tracked')
+    else:
+        # Loop filter gains, computed once for all channels
+        gains = loop_filter_gains(settings)
+        for channelNr in active:
+            trackResults[channelNr] = track_channel(data, channelNr, channel[channelNr], settings,
+                                                    gains=gains)
 
     return trackResults, channel
@@ -49,22 +49,25 @@ from Include.postProcessing import postProcessing
 #     'the terms described in the license.\n\n'])
 # print('                   -------------------------------\n\n')
 
-# Initialize constants, settings =========================================
-settings = init_settings()
+# The processing is started only when the script is run, not when it is
+# imported (the spawned parallel tracking workers import it again)
+if __name__ == '__main__':
+    # Initialize constants, settings =========================================
+    settings = init_settings()
 
-try:
-    print(f'Probing data ({settings.fileName})...')
-    probeData(settings)
-except Exception as e:
-    print(str(e))
-    print('  (change settings in "init_settings.py" to reconfigure)')
-    exit()
-
-print('  Raw IF data plotted ')
-print('  (change settings in "init_settings.py" to reconfigure)')
-print(' ')
-gnssStart = input('Enter "1" to initiate GNSS processing or "0" to exit : ')
+    try:
+        print(f'Probing data ({settings.fileName})...')
+        probeData(settings)
+    except Exception as e:
+        print(str(e))
+        print('  (change settings in "init_settings.py" to reconfigure)')
+        exit()
 
-if gnssStart.strip() == "1":
-    postProcessing(settings)
+    if settings.probePlot:
+        print('  Raw IF data plotted ')
+    print('  (change settings in "init_settings.py" to reconfigure)')
+    print(' ')
+    gnssStart = input('Enter "1" to initiate GNSS processing or "0" to exit : ')
 
+    if gnssStart.strip() == "1":
+        postProcessing(settings)
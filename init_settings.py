@@ -23,11 +23,35 @@
 # USA.
 # -----------------------------------------------------------------------------
 
-from dataclasses import dataclass, field
-from typing import List
+from dataclasses import dataclass, field, InitVar
+from enum import IntFlag
+from typing import Final
+import math
 import numpy as np
 
-@dataclass
+# Physical constants, shared by all Settings instances and used directly by
+# the navigation code
+C: Final[int] = 299792458           # The speed of light, [m/s]
+START_OFFSET_MS: Final[float] = 68.802   # [ms] Default initial signal travel time
+
+# Default list of satellites to look for (all GPS PRNs), as a contiguous
+# uint8 array. It is read-only and shared by all Settings instances instead
+# of being rebuilt for each one.
+_ACQ_PRNS = np.arange(1, 32, dtype=np.uint8)
+_ACQ_PRNS.flags.writeable = False
+
+def _default_acq_prns():
+    # Default factory of Settings.acqSatelliteList (an array cannot be a
+    # plain dataclass default): returns the shared array, no copy is made
+    return _ACQ_PRNS
+
+class PlotFlag(IntFlag):
+    # Bits of Settings.plotFlags
+    TRACKING = 1
+    ACQUISITION = 2
+    NAVIGATION = 4
+
+@dataclass(slots=True)
 class TruePosition:
     # True position of the antenna in UTM system (if known). Otherwise enter
     # all NaN's and mean position will be used as a reference.
@@ -35,14 +59,24 @@ class TruePosition:
     N: float = np.nan
     U: float = np.nan
 
-@dataclass
+    # True if the position is known (none of E, N, U is NaN). Kept up to date
+    # by __setattr__ whenever E, N or U is set, so users only read a flag.
+    valid: bool = field(init=False)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in ('E', 'N', 'U'):
+            object.__setattr__(self, 'valid', not any(
+                math.isnan(getattr(self, coord, math.nan)) for coord in ('E', 'N', 'U')))
+
+@dataclass(slots=True)
 class CNoSettings:
     # Accumulation interval in Tracking (in Sec)
     accTime: float = 0.001
     # Accumulation interval for computing VSM C/No (in ms)
     VSMinterval: int = 40
 
-@dataclass
+@dataclass(slots=True)
 class Settings:
     # =========================================================================
     # Processing settings
@@ -54,10 +88,16 @@ class Settings:
     # Number of channels to be used for signal processing
     numberOfChannels: int = 10
 
+    # Compile (or load) the Numba kernels in preRun, before tracking starts.
+    # Turn off to measure the compile time where it is first needed.
+    warmupJIT: int = 1       # 0 - Off; 1 - On
+
     # Move the starting point of processing. Can be used to start the signal
-    # processing at any point in the data record (e.g. for long records). fseek
-    # function is used to move the file read point, therefore advance is byte
-    # based only.
+    # processing at any point in the data record (e.g. for long records). The
+    # advance is in bytes from the start of the file (for acquisition,
+    # tracking and probeData alike) and must skip whole samples, e.g. a
+    # multiple of 2 for 8 bit I/Q data. The data file is memory-mapped, so
+    # the skipped part is never read.
     skipNumberOfBytes: int = 0
 
     # =========================================================================
@@ -68,8 +108,9 @@ class Settings:
     # fileName: str = '../../../L1_IF20KHz_FS18MHz.bin'
     fileName: str = '../testData/testData.bin'
 
-    # Data type used to store one sample
-    dataType: str = 'schar'
+    # Data type used to store one sample: 'schar', 'short' or 'float', or the
+    # NumPy type or dtype (np.int8, np.int16 or np.float32)
+    dataType: str | np.dtype | type = 'schar'
 
     # File Types
     # 1 - 8 bit real samples S0,S1,S2,...
@@ -91,8 +132,9 @@ class Settings:
     skipAcquisition: int = 0
 
     # List of satellites to look for. Some satellites can be excluded to speed
-    # up acquisition
-    acqSatelliteList: List[int] = field(default_factory=lambda: list(range(1, 32)))  # [PRN numbers]
+    # up acquisition, by assigning a new list or array (e.g. with a mask:
+    # settings.acqSatelliteList = prns[prns != 5])
+    acqSatelliteList: np.ndarray = field(default_factory=_default_acq_prns)  # [PRN numbers]
 
     # Band around IF to search for satellite signal. Depends on max Doppler.
     # It is single sideband, so the whole search band is twice of it.
@@ -101,18 +143,28 @@ class Settings:
     # Non-coherent integration times after 1ms coherent integration
     acqNonCohTime: int = 20    # [ms]
 
+    # Coherent integration time of the block acquisition (acq.py, acquire_gpu)
+    acqCoherentInt: int = 1    # [ms]
+
     # Threshold for the signal presence decision rule
     acqThreshold: float = 3.5
 
     # Frequency search step for coarse acquisition
     acqSearchStep: int = 500   # [Hz]
 
-    # Sampling rate threshold for downsampling 
+    # Sampling rate threshold for downsampling. Acquisition decimates higher
+    # rates by an integer factor to this rate or below, as far as the signal
+    # band (main lobe and search band around IF) allows
     resamplingThreshold: float = 8e6  # [Hz]
 
     # Enable/disable use of downsampling for acquisition
     resamplingflag: int = 0    # 0 - Off; 1 - On
 
+    # Run the coarse acquisition search on a CUDA GPU (requires CuPy)
+    useGPU: int = 0    # 0 - Off; 1 - On
+    # CUDA device used for it (device number, as listed by nvidia-smi)
+    gpuDevice: int = 0
+
     # =========================================================================
     # Tracking loops settings
     # =========================================================================
@@ -128,6 +180,15 @@ class Settings:
     # Integration time for DLL and PLL
     intTime: float = 0.001   # [s]
 
+    # Number of processes used to track the channels in parallel (1 - serial).
+    # The processes are spawned, so scripts using more than 1 must guard their
+    # entry point with if __name__ == '__main__': (as init.py does). Starting
+    # a process takes a few seconds, which pays off for long records only.
+    trackingWorkers: int = 1
+
+    # Suppress the tracking progress bar (e.g. when timing the receiver)
+    quiet: int = 0           # 0 - Off; 1 - On
+
     # =========================================================================
     # Navigation solution settings
     # =========================================================================
@@ -147,26 +208,111 @@ class Settings:
     # =========================================================================
     # Plot settings
     # =========================================================================
-    # Enable/disable plotting of the tracking results for each channel
-    plotTracking: int = 1    # 0 - Off; 1 - On
-    plotAcquisition: int = 1
-    plotNavigation: int = 1
+    # Enable/disable plotting of the tracking results for each channel, the
+    # acquisition results and the navigation solution, as bits of one flag
+    # (also readable and settable one by one as plotTracking,
+    # plotAcquisition and plotNavigation, 0 - Off; 1 - On)
+    plotFlags: PlotFlag = PlotFlag.TRACKING | PlotFlag.ACQUISITION | PlotFlag.NAVIGATION
+    # The single switches can also be given to the constructor (and to
+    # dataclasses.replace); they set or clear their bit of plotFlags
+    plotTracking: InitVar[int | None] = None
+    plotAcquisition: InitVar[int | None] = None
+    plotNavigation: InitVar[int | None] = None
+    # Enable/disable plotting of the raw data in probeData
+    probePlot: int = 1
 
     # =========================================================================
     # Constants
     # =========================================================================
-    c: int = 299792458       # The speed of light, [m/s]
-    startOffset: float = 68.802   # [ms] Initial signal travel time
+    # The speed of light is the module constant C (settings.c reads it)
+    startOffset: float = START_OFFSET_MS   # [ms] Initial signal travel time
 
     # =========================================================================
     # CNo Settings
     # =========================================================================
     CNo: CNoSettings = field(default_factory=CNoSettings)
 
+    def __post_init__(self, plotTracking, plotAcquisition, plotNavigation):
+        for flag, on in ((PlotFlag.TRACKING, plotTracking),
+                         (PlotFlag.ACQUISITION, plotAcquisition),
+                         (PlotFlag.NAVIGATION, plotNavigation)):
+            if on is not None:
+                self._set_plot_flag(flag, on)
+
+        # Reject settings the receiver cannot process, so that an error
+        # shows up here rather than deep inside acquisition or tracking
+        # (assignments after construction are not checked)
+        positive = ('msToProcess', 'numberOfChannels', 'samplingFreq', 'codeFreqBasis',
+                    'codeLength', 'acqNonCohTime', 'acqSearchStep', 'dllDampingRatio',
+                    'dllNoiseBandwidth', 'pllDampingRatio', 'pllNoiseBandwidth',
+                    'intTime', 'trackingWorkers', 'navSolPeriod')
+        for name in positive:
+            if not getattr(self, name) > 0:
+                raise ValueError(f"{name} must be positive, got {getattr(self, name)}")
+        if self.fileType not in (1, 2):
+            raise ValueError(f"fileType must be 1 (real) or 2 (I/Q), got {self.fileType}")
+        if self.acqSearchBand < 0:
+            raise ValueError(f"acqSearchBand must not be negative, got {self.acqSearchBand}")
+        if not self.CNo.VSMinterval > 0:
+            raise ValueError(f"CNo.VSMinterval must be positive, got {self.CNo.VSMinterval}")
+
+    def _set_plot_flag(self, flag, on):
+        self.plotFlags = self.plotFlags | flag if on else self.plotFlags & ~flag
+
+    # =========================================================================
+    # Derived parameters
+    # =========================================================================
+    @property
+    def c(self) -> int:
+        # The speed of light, [m/s] (kept for code that reads settings.c)
+        return C
+
+    @property
+    def samples_per_code(self) -> int:
+        # Number of samples per spreading code period. Derived on access, so
+        # it follows changes of samplingFreq after construction.
+        return int(round(self.codeLength * self.samplingFreq / self.codeFreqBasis))
+
+    @property
+    def samples_per_chip(self) -> float:
+        # Number of samples per code chip
+        return self.samplingFreq / self.codeFreqBasis
+
+    @property
+    def sampling_period(self) -> float:
+        # Sampling period, [s]
+        return 1 / self.samplingFreq
+
+    @property
+    def acq_doppler_bins(self) -> np.ndarray:
+        # Frequency offsets from IF of the coarse acquisition bins, from
+        # +acqSearchBand down to -acqSearchBand in steps of acqSearchStep
+        # (the order in which acquisition searches them), [Hz]
+        num_freq = 2 * int(self.acqSearchBand / self.acqSearchStep) + 1
+        return np.linspace(self.acqSearchBand, -self.acqSearchBand, num_freq)
+
+# Plot switches (bits of plotFlags), readable and settable one by one. The
+# properties are attached after the class is created: defined in the class
+# body they would become the defaults of the init-only arguments above.
+def _plot_switch(flag):
+    def get(self) -> int:
+        return int(bool(self.plotFlags & flag))
+    def set(self, on):
+        self._set_plot_flag(flag, on)
+    return property(get, set)
+
+Settings.plotTracking = _plot_switch(PlotFlag.TRACKING)
+Settings.plotAcquisition = _plot_switch(PlotFlag.ACQUISITION)
+Settings.plotNavigation = _plot_switch(PlotFlag.NAVIGATION)
+
 def init_settings() -> Settings:
     """
     Initializes and returns a Settings object with default values.
 
+    A new object is returned by every call: the settings are adjusted by
+    assigning to its fields (e.g. settings.fileName = ...), so one shared
+    instance would carry such changes over to other callers.
+
     Returns:
         settings (Settings): Receiver settings (a structure).
     """
@@ -0,0 +1,100 @@
+"""
+End-to-end check of the parallel tracking path: a short synthetic record is
+tracked serially and with spawned worker processes, and the results must be
+identical. Run from the repository root with
+
+    python -m unittest discover -s tests
+"""
+
+import contextlib
+import io
+import os
+import runpy
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from init_settings import init_settings
+from Include.generateCAcode import generate_ca_code
+from Include.preRun import CHANNEL_DTYPE
+from Include.tracking import tracking
+from Include._io_utils import map_if_file
+
+# Signals of the synthetic record: PRN, Doppler [Hz], code phase [chips]
+SIGNALS = [(3, 1000.0, 300.0), (11, 3500.0, 50.0), (19, -500.0, 510.0)]
+
+def _write_record(path, settings, n_ms):
+    # Writes n_ms of int8 I/Q samples with the signals of SIGNALS in noise
+    rng = np.random.default_rng(1)
+    t = np.arange(int(settings.samplingFreq * n_ms / 1000)) / settings.samplingFreq
+    sig = np.zeros(len(t), dtype=complex)
+    for prn, doppler, code_phase in SIGNALS:
+        ca = generate_ca_code(prn)
+        chips = (t * settings.codeFreqBasis * (1 + doppler / 1575.42e6) + code_phase).astype(int) % 1023
+        sig += ca[chips] * np.exp(2j * np.pi * (settings.IF + doppler) * t)
+    sig += 6 * (rng.standard_normal(len(t)) + 1j * rng.standard_normal(len(t)))
+    iq = np.empty(2 * len(t), dtype=np.int8)
+    iq[0::2] = np.clip(np.round(sig.real), -127, 127)
+    iq[1::2] = np.clip(np.round(sig.imag), -127, 127)
+    iq.tofile(path)
+
+class ParallelTrackingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings = init_settings()
+        settings.fileName = os.path.join(self.tmp.name, 'record.bin')
+        settings.samplingFreq = 4e6
+        settings.IF = 20e3
+        settings.msToProcess = 80
+        settings.numberOfChannels = 4
+        settings.quiet = 1
+        _write_record(settings.fileName, settings, settings.msToProcess + 20)
+        self.settings = settings
+
+        # Channels set up as pre_run would from the known signals; the last
+        # channel is left off
+        channel = np.zeros(settings.numberOfChannels, dtype=CHANNEL_DTYPE)
+        channel['status'] = '-'
+        for channelNr, (prn, doppler, code_phase) in enumerate(SIGNALS):
+            channel[channelNr] = (prn, settings.IF + doppler,
+                                  round((1023 - code_phase) * settings.samples_per_chip), 'T')
+        self.channel = channel
+
+    def track(self, workers):
+        self.settings.trackingWorkers = workers
+        with contextlib.redirect_stdout(io.StringIO()):
+            trackResults, _ = tracking(map_if_file(self.settings), self.channel.copy(),
+                                       self.settings)
+        return trackResults
+
+    def test_workers_match_serial(self):
+        serial = self.track(1)
+        parallel = self.track(2)
+        for ser, par in zip(serial, parallel):
+            self.assertEqual(ser['PRN'], par['PRN'])
+            self.assertEqual(ser['status'], par['status'])
+            for key in ('I_P', 'Q_P', 'carrFreq', 'codeFreq', 'absoluteSample'):
+                np.testing.assert_array_equal(ser[key], par[key])
+        # The tracked channels hold a signal
+        for channelNr in range(len(SIGNALS)):
+            self.assertGreater(np.mean(np.abs(serial[channelNr]['I_P'][-20:])),
+                               np.mean(np.abs(serial[channelNr]['Q_P'][-20:])))
+
+    def test_entry_point_import_has_no_side_effects(self):
+        # A spawned worker imports the entry script under the name
+        # __mp_main__; this must neither probe the data nor prompt for input
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            runpy.run_path(os.path.join(ROOT, 'init.py'), run_name='__mp_main__')
+        self.assertEqual(out.getvalue(), '')
+
+if __name__ == '__main__':
+    unittest.main()